@@ -80,12 +80,11 @@ def create_directories() -> None:
         './data',
         './data/pipedrive',
         './data/tz_file',
-        './data/c3_files',
-        './data/c3_files/contact_skip_traced_addresses',
-        './data/c3_files/contact_addresses',
-        './data/c3_files/contact_email_addresses',
-        './data/c3_files/contact_phone_numbers',
-        './data/c3_files/contacts'
+        './data/phone_index',
+        './data/list_cleaner_cache',
+        './data/cm_cache',
+        './data/cm_mirror',
+        './data/c3_files'
         ]
     
     for dir in directories:
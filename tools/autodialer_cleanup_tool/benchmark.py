@@ -0,0 +1,75 @@
+import time
+import numpy as np
+import pandas as pd
+from .cleanup_autodialer import remove_phone_dupes
+
+# Run with: python -m tools.autodialer_cleanup_tool.benchmark
+
+def legacy_remove_phone_dupes(df: pd.DataFrame) -> pd.DataFrame:
+
+    # Sort-and-isin cascade that remove_phone_dupes replaced, kept as the reference result
+    df = df.copy()
+    df['original_index'] = df.index
+    phone_columns = ['phone1', 'phone2', 'phone3', 'phone4', 'phone5']
+    sorted_df = df.sort_values(by=phone_columns, ascending=False)
+
+    for phone in phone_columns:
+        sorted_df.loc[(sorted_df[phone].notna()) & (sorted_df[phone].duplicated(keep='last')), phone] = pd.NA
+
+    phone_filter_mask = (sorted_df['phone5'].isin(sorted_df['phone2'])) \
+    | (sorted_df['phone5'].isin(sorted_df['phone3'])) \
+    | (sorted_df['phone5'].isin(sorted_df['phone4'])) \
+    | (sorted_df['phone5'].isin(sorted_df['phone1']))
+    sorted_df.loc[(sorted_df['phone5'].notna()) & (phone_filter_mask), 'phone5'] = pd.NA
+
+    phone_filter_mask = (sorted_df['phone4'].isin(sorted_df['phone3'])) \
+    | (sorted_df['phone4'].isin(sorted_df['phone2'])) \
+    | (sorted_df['phone4'].isin(sorted_df['phone1']))
+    sorted_df.loc[(sorted_df['phone4'].notna()) & (phone_filter_mask), 'phone4'] = pd.NA
+
+    phone_filter_mask = (sorted_df['phone3'].isin(sorted_df['phone2'])) \
+    | (sorted_df['phone3'].isin(sorted_df['phone1']))
+    sorted_df.loc[(sorted_df['phone3'].notna()) & (phone_filter_mask), 'phone3'] = pd.NA
+
+    phone_filter_mask = (sorted_df['phone2'].isin(sorted_df['phone1']))
+    sorted_df.loc[(sorted_df['phone2'].notna()) & (phone_filter_mask), 'phone2'] = pd.NA
+
+    sorted_df = sorted_df.sort_values(by='original_index')
+    sorted_df = sorted_df.drop(columns='original_index')
+    return sorted_df
+
+def make_synthetic_list(row_count: int, seed: int = 0) -> pd.DataFrame:
+
+    # Phones drawn from a pool smaller than the list so duplicates occur within and across columns
+    rng = np.random.default_rng(seed)
+    phone_pool = rng.integers(2_000_000_000, 9_999_999_999, size=max(row_count // 2, 10), dtype='int64')
+
+    list_df = pd.DataFrame({'contact_id': np.arange(row_count)})
+    for slot, phone in enumerate(['phone1', 'phone2', 'phone3', 'phone4', 'phone5']):
+        phones = pd.array(rng.choice(phone_pool, size=row_count), dtype='Int64')
+        phones[rng.random(row_count) < 0.15 + slot * 0.15] = pd.NA
+        list_df[phone] = phones
+
+    return list_df
+
+def time_call(func, df: pd.DataFrame) -> 'tuple[pd.DataFrame, float]':
+    start = time.perf_counter()
+    result = func(df)
+    return result, time.perf_counter() - start
+
+def main(row_count: int = 1_000_000) -> None:
+
+    list_df = make_synthetic_list(row_count)
+    print(f"Synthetic list: {row_count:,} rows")
+
+    legacy_df, legacy_seconds = time_call(legacy_remove_phone_dupes, list_df)
+    print(f"Sort-and-isin cascade: {legacy_seconds:.2f}s")
+
+    deduped_df, seconds = time_call(remove_phone_dupes, list_df)
+    print(f"Single-pass dedup:     {seconds:.2f}s")
+
+    pd.testing.assert_frame_equal(deduped_df, legacy_df)
+    print(f"Results identical, {legacy_seconds / seconds:.1f}x faster")
+
+if __name__ == "__main__":
+    main()
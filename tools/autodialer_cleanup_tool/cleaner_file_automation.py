@@ -1,14 +1,19 @@
-import re
 import os
+import time
+import random
+import numpy as np
 import pandas as pd
 import warnings
 import dropbox
 import webbrowser
 import customtkinter as ctk
-from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from io import BytesIO
 from openpyxl import load_workbook
+from .phone_index import INDEXED_SHEETS, build_sheet_index, record_source_rev
+from .list_cleaner_cache import ApiCallCounter, load_state, save_state, sync_source_entries, download_file
 
 warnings.simplefilter(action='ignore', category=pd.errors.SettingWithCopyWarning)
 warnings.simplefilter("ignore", UserWarning)
@@ -16,6 +21,24 @@ load_dotenv(dotenv_path='misc/.env')
 APP_KEY = os.getenv('DROPBOX_APP_KEY')
 APP_SECRET = os.getenv('DROPBOX_APP_SECRET')
 
+# Latest-file folders that only feed the cumulative sheets, so an already
+# processed export does not need to be folded in again
+CUMULATIVE_FOLDERS = ['pd_db', 'pd_phone', 'pd_remove', 'pd_convdups', 'sly', 'pd_jr_aa']
+
+# Source folder downloads are latency bound, so fetch several files at once
+MAX_DOWNLOAD_WORKERS = 8
+DOWNLOAD_RETRIES = 4
+
+# Phone columns of the Pipedrive exports
+PD_PHONE_COLUMNS = [f'Person - Phone {i}' for i in range(1, 11)]
+PD_DUPLICATE_PHONE_COLUMNS = [f'Person - Phone {i}' for i in range(2, 11)] + [
+    'Person - Phone - Work',
+    'Person - Phone - Home',
+    'Person - Phone - Mobile',
+    'Person - Phone - Other',
+    'Person - Archive - Phone'
+]
+
 # def append_to_multiple_sheets(update_df, sheet_name, excel_path: str):
 #     print("Saving all sheets")
 #     sheet = excel_workbook[sheet_name]
@@ -39,13 +62,21 @@ def save_all_files():
     # with pd.ExcelWriter(excel_path, engine='openpyxl', mode='a', if_sheet_exists='replace') as writer:
     #     final_df.to_excel(writer, sheet_name='CallOut-14d+TextOut-30d', index=False, header=False)
 
-    final_df.to_csv('./data/CallOut-14d+TextOut-30d (Cold).csv', index=False, header=None)
-    final_seven_df.to_csv('./data/CallTextOut-7d (PD).csv', index=False, header=None)
-    mvp_df.drop_duplicates().dropna().to_csv('./data/CCM+CH+MVPC+MVPT+JC+RC+PD (Cold).csv', index=False, header=None)
-    dnc_df.drop_duplicates().dropna().to_csv('./data/DNC (Cold-PD).csv', index=False, header=None)
-    conv_df.drop_duplicates().dropna().to_csv('./data/PDConvDup (PD).csv', index=False, header=None)
-    db_id_df.drop_duplicates().dropna().to_csv('./data/UniqueDB ID (Cold).csv', index=False, header=None)
-    pd_jr_aa_df.drop_duplicates().dropna().to_csv('./data/PDJRAADups (PD).csv', index=False, header=None)
+    sheets = {
+        "CallOut-14d+TextOut-30d (Cold)": final_df,
+        "CallTextOut-7d (PD)": final_seven_df,
+        "CCM+CH+MVPC+MVPT+JC+RC+PD (Cold)": mvp_df.drop_duplicates().dropna(),
+        "DNC (Cold-PD)": dnc_df.drop_duplicates().dropna(),
+        "PDConvDup (PD)": conv_df.drop_duplicates().dropna(),
+        "UniqueDB ID (Cold)": db_id_df.drop_duplicates().dropna(),
+        "PDJRAADups (PD)": pd_jr_aa_df.drop_duplicates().dropna()
+    }
+
+    # The CSVs stay the Dropbox exchange format, the indexes are built from the frames already in memory
+    print("Building list cleaner indexes")
+    for sheet_name, sheet_df in sheets.items():
+        sheet_df.to_csv(f'./data/{sheet_name}.csv', index=False, header=None)
+        build_sheet_index(sheet_name, sheet_df.get(0))
 
 def get_update_df(update_df: pd.DataFrame, sheet_name: str):
     pass
@@ -83,19 +114,90 @@ def export_to_dropbox(root_path: str, local_data_path: str, dbx: dropbox.Dropbox
         local_file_path = f"{local_data_path}/{sheet_name}.csv"
 
         with open(local_file_path, 'rb') as f:
-            dbx.files_upload(f.read(), dropbox_path, mode=dropbox.files.WriteMode.overwrite)
+            metadata = dbx.files_upload(f.read(), dropbox_path, mode=dropbox.files.WriteMode.overwrite)
+
+        if sheet_name in INDEXED_SHEETS:
+            record_source_rev(sheet_name, metadata.rev)
+
+        cache_state['sheet_revs'][sheet_name] = metadata.rev
+        cache_state['entries'][metadata.path_lower] = {
+            'content_hash': metadata.content_hash,
+            'rev': metadata.rev,
+            'client_modified': metadata.client_modified.isoformat()
+        }
 
     print("Sucessfully uploaded Updated List Cleaner Files to Dropbox")
 
-def read_dropbox_file(path: str, dbx):
-    metadata, response = dbx.files_download(path)
+def download_dropbox_file(path: str, dbx) -> bytes:
+    # Incremental runs reuse the cached copy of unchanged source files
+    content_hash = cache_state['entries'].get(path, {}).get('content_hash') if incremental_mode else None
+    return download_file(path, dbx, content_hash)
+
+def parse_dropbox_file(path: str, content: bytes) -> pd.DataFrame:
     if path.endswith('.csv'):
-        return pd.read_csv(BytesIO(response.content), low_memory=False, encoding_errors='replace')
+        return pd.read_csv(BytesIO(content), low_memory=False, encoding_errors='replace')
     elif path.endswith('.xlsx'):
-        return pd.read_excel(BytesIO(response.content))
+        return pd.read_excel(BytesIO(content))
     else:
         raise ValueError("Invalid file format: Please provide a .csv, .xlsx or .xlsb file.")
+
+def parse_mvp_calls_file(path: str, content: bytes) -> pd.DataFrame:
+    return pd.read_excel(BytesIO(content), sheet_name='Calls')
+
+def read_dropbox_file(path: str, dbx):
+    return parse_dropbox_file(path, download_dropbox_file(path, dbx))
+
+def download_with_retry(path: str, dbx) -> bytes:
+    for attempt in range(DOWNLOAD_RETRIES):
+        try:
+            return download_dropbox_file(path, dbx)
+        except dropbox.exceptions.ApiError:
+            # Path or permission errors will not succeed on retry
+            raise
+        except Exception as e:
+            if attempt == DOWNLOAD_RETRIES - 1:
+                raise
+            delay = 2 ** attempt + random.uniform(0, 1)
+            print(f"Download of {path} failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def list_folder_files(path: str, dbx) -> list:
+    result = dbx.files_list_folder(path)
+    files = [entry for entry in result.entries if isinstance(entry, dropbox.files.FileMetadata)]
+
+    while result.has_more:
+        result = dbx.files_list_folder_continue(result.cursor)
+        files.extend(entry for entry in result.entries if isinstance(entry, dropbox.files.FileMetadata))
+
+    return files
+
+def concat_folder_files(path: str, dbx, parse_file=parse_dropbox_file, extensions: 'tuple | None' = None):
+    files = [file for file in list_folder_files(path, dbx) if extensions is None or file.path_lower.endswith(extensions)]
+    if not files:
+        return None
+
+    def fetch_and_parse(file_path: str) -> pd.DataFrame:
+        return parse_file(file_path, download_with_retry(file_path, dbx))
+
+    # Parse each file as soon as it arrives but keep the listing order for the concat
+    df_list = [None] * len(files)
+    with ThreadPoolExecutor(max_workers=min(MAX_DOWNLOAD_WORKERS, len(files))) as executor:
+        futures = {executor.submit(fetch_and_parse, file.path_lower): i for i, file in enumerate(files)}
+        for future in as_completed(futures):
+            df_list[futures[future]] = future.result()
+
+    return pd.concat(df_list)
     
+def extract_phone_numbers(df: pd.DataFrame, phone_columns: list) -> np.ndarray:
+    # Stack all phone columns, then split comma separated entries into one phone per row
+    phones = pd.concat([df[column] for column in phone_columns], ignore_index=True).dropna()
+    phones = phones.astype(str).str.replace('.0', '', regex=False)  # Remove `.0` from floats
+    phones = phones.str.split(',').explode().str.strip()
+
+    # Keep valid 10 digit phones and normalize them to integers
+    phones = phones[phones.str.fullmatch(r'\+?\d{10}', na=False)].str.lstrip('+')
+    return pd.unique(pd.to_numeric(phones).to_numpy(dtype='int64'))
+
 def add_pd_phones(path: str, dbx):
     print("Processing Pipedrive Phones Export")
     global mvp_df
@@ -104,36 +206,10 @@ def add_pd_phones(path: str, dbx):
             axis=1,
             inplace=True)
 
-    # Select only the phone columns (Phone 1 to Phone 10)
-    phone_columns = [f'Person - Phone {i}' for i in range(1, 11)]
-    phones_df = df[phone_columns]
-
-    # Initialize a list to hold all phone numbers
-    all_phone_numbers = []
-
-    # Iterate over each column and each row to extract phone numbers
-    for column in phone_columns:
-        phones_df[column] = phones_df[column].fillna('')  # Replace NaN with an empty string
-        for phone_entry in phones_df[column]:
-            # Convert each entry to a string, handle floats (remove .0), and split comma-separated values
-            phone_entry = str(phone_entry).replace('.0', '')  # Remove `.0` from floats
-            valid_phone_pattern = re.compile(r'^\+?\d{10}$')  # A simple pattern for phone numbers (you can adjust it)
-            all_phone_numbers.extend([phone.strip() for phone in phone_entry.split(',') if phone.strip() and valid_phone_pattern.match(phone.strip())])
-            # all_phone_numbers.extend([phone.strip() for phone in phone_entry.split(',') if phone.strip()])
-
-    # Create a DataFrame from the extracted phone numbers
-    result_df = pd.DataFrame({'Phone Number': all_phone_numbers})
-
-    result_df['Phone Number'] = result_df['Phone Number'] \
-        .str.replace("(", "") \
-        .str.replace(")", "") \
-        .str.replace("-", "") \
-        .str.replace(" ", "")
-    
-    result_df.drop_duplicates(subset=['Phone Number'], inplace=True)
+    # Extract all valid phone numbers from Phone 1 to Phone 10
+    result_df = pd.DataFrame({0: extract_phone_numbers(df, PD_PHONE_COLUMNS)})
 
     # get_update_df(result_df, 'CCM+CH+MVPC+MVPT+JC+RC+PD')
-    result_df.columns = [0]
     mvp_df = pd.concat([mvp_df, result_df], ignore_index=True)
     result_df = None
     
@@ -180,70 +256,16 @@ def add_pd_jr_aa_dup(path: str, dbx):
     print("Processing Pipedrive JR AA Duplicate")
     global pd_jr_aa_df
     df = read_dropbox_file(path, dbx)
-    phone_columns = [f'Person - Phone {i}' for i in range(2, 11)]
-    phone_columns.extend(['Person - Phone - Work', 'Person - Phone - Home', 'Person - Phone - Mobile', 'Person - Phone - Other', 'Person - Archive - Phone'])
-    phones_df = df[phone_columns]
-
-    all_phone_numbers = []
-
-    # Iterate over each column and each row to extract phone numbers
-    for column in phone_columns:
-        phones_df[column] = phones_df[column].fillna('')  # Replace NaN with an empty string
-        for phone_entry in phones_df[column]:
-            # Convert each entry to a string, handle floats (remove .0), and split comma-separated values
-            phone_entry = str(phone_entry).replace('.0', '')  # Remove `.0` from floats
-            valid_phone_pattern = re.compile(r'^\+?\d{10}$')  # A simple pattern for phone numbers (you can adjust it)
-            all_phone_numbers.extend([phone.strip() for phone in phone_entry.split(',') if phone.strip() and valid_phone_pattern.match(phone.strip())])
-            # all_phone_numbers.extend([phone.strip() for phone in phone_entry.split(',') if phone.strip()])
-
-    # Create a DataFrame from the extracted phone numbers
-    result_df = pd.DataFrame({'Phone Number': all_phone_numbers})
-
-    result_df['Phone Number'] = result_df['Phone Number'] \
-        .str.replace("(", "") \
-        .str.replace(")", "") \
-        .str.replace("-", "") \
-        .str.replace(" ", "")
-    
-    result_df.drop_duplicates(subset=['Phone Number'], inplace=True)
 
-    result_df.columns = [0]
-    pd_jr_aa_df = result_df
-    result_df = None
+    pd_jr_aa_df = pd.DataFrame({0: extract_phone_numbers(df, PD_DUPLICATE_PHONE_COLUMNS)})
 
 def add_pd_conv_dup(path: str, dbx):
     print("Processing Pipedrive Conversion Duplicate")
     global conv_df
     df = read_dropbox_file(path, dbx)
-    phone_columns = [f'Person - Phone {i}' for i in range(2, 11)]
-    phone_columns.extend(['Person - Phone - Work', 'Person - Phone - Home', 'Person - Phone - Mobile', 'Person - Phone - Other', 'Person - Archive - Phone'])
-    phones_df = df[phone_columns]
-
-    all_phone_numbers = []
-
-    # Iterate over each column and each row to extract phone numbers
-    for column in phone_columns:
-        phones_df[column] = phones_df[column].fillna('')  # Replace NaN with an empty string
-        for phone_entry in phones_df[column]:
-            # Convert each entry to a string, handle floats (remove .0), and split comma-separated values
-            phone_entry = str(phone_entry).replace('.0', '')  # Remove `.0` from floats
-            valid_phone_pattern = re.compile(r'^\+?\d{10}$')  # A simple pattern for phone numbers (you can adjust it)
-            all_phone_numbers.extend([phone.strip() for phone in phone_entry.split(',') if phone.strip() and valid_phone_pattern.match(phone.strip())])
-            # all_phone_numbers.extend([phone.strip() for phone in phone_entry.split(',') if phone.strip()])
-
-    # Create a DataFrame from the extracted phone numbers
-    result_df = pd.DataFrame({'Phone Number': all_phone_numbers})
-
-    result_df['Phone Number'] = result_df['Phone Number'] \
-        .str.replace("(", "") \
-        .str.replace(")", "") \
-        .str.replace("-", "") \
-        .str.replace(" ", "")
-    
-    result_df.drop_duplicates(subset=['Phone Number'], inplace=True)
+    result_df = pd.DataFrame({0: extract_phone_numbers(df, PD_DUPLICATE_PHONE_COLUMNS)})
 
     # get_update_df(result_df, 'PDConvDup')
-    result_df.columns = [0]
     conv_df = pd.concat([conv_df, result_df], ignore_index=True)
     result_df = None
 
@@ -251,35 +273,9 @@ def add_remove_list(path: str, dbx):
     print("Processing Pipedrive Remove From List")
     global dnc_df
     df = read_dropbox_file(path, dbx)
-    phone_columns = [f'Person - Phone {i}' for i in range(2, 11)]
-    phone_columns.extend(['Person - Phone - Work', 'Person - Phone - Home', 'Person - Phone - Mobile', 'Person - Phone - Other', 'Person - Archive - Phone'])
-    phones_df = df[phone_columns]
-
-    all_phone_numbers = []
-
-    # Iterate over each column and each row to extract phone numbers
-    for column in phone_columns:
-        phones_df[column] = phones_df[column].fillna('')  # Replace NaN with an empty string
-        for phone_entry in phones_df[column]:
-            # Convert each entry to a string, handle floats (remove .0), and split comma-separated values
-            phone_entry = str(phone_entry).replace('.0', '')  # Remove `.0` from floats
-            valid_phone_pattern = re.compile(r'^\+?\d{10}$')  # A simple pattern for phone numbers (you can adjust it)
-            all_phone_numbers.extend([phone.strip() for phone in phone_entry.split(',') if phone.strip() and valid_phone_pattern.match(phone.strip())])
-            # all_phone_numbers.extend([phone.strip() for phone in phone_entry.split(',') if phone.strip()])
-
-    # Create a DataFrame from the extracted phone numbers
-    result_df = pd.DataFrame({'Phone Number': all_phone_numbers})
-
-    result_df['Phone Number'] = result_df['Phone Number'] \
-        .str.replace("(", "") \
-        .str.replace(")", "") \
-        .str.replace("-", "") \
-        .str.replace(" ", "")
-    
-    result_df.drop_duplicates(subset=['Phone Number'], inplace=True)
+    result_df = pd.DataFrame({0: extract_phone_numbers(df, PD_DUPLICATE_PHONE_COLUMNS)})
 
     # get_update_df(result_df, 'DNC')
-    result_df.columns = [0]
     dnc_df = pd.concat([dnc_df, result_df], ignore_index=True)
     result_df = None
 
@@ -304,8 +300,7 @@ def add_remove_list(path: str, dbx):
 def add_jc(path: str, dbx):
     print("Processing Just Call")
     global mvp_df
-    metadata, response = dbx.files_download(path)
-    df = pd.read_excel(BytesIO(response.content),
+    df = pd.read_excel(BytesIO(download_dropbox_file(path, dbx)),
                        sheet_name="Messages Details",
                        header=6,
                        usecols=['Client Number', 'Delivery Status', 'Datetime'],
@@ -544,172 +539,52 @@ def add_c3(df: pd.DataFrame, dbx):
     dnc_df = pd.concat([dnc_df, output_df], ignore_index=True)
     output_df = None
 
-def get_latest_file(folder_path, dbx):
-    try:
-        # List files in the folder
-        response = dbx.files_list_folder(folder_path)
-
-        latest_file = None
-        latest_timestamp = None
-
-        for entry in response.entries:
-            if isinstance(entry, dropbox.files.FileMetadata):
-                # Compare the 'client_modified' timestamp to find the latest file
-                if latest_timestamp is None or entry.client_modified > latest_timestamp:
-                    latest_file = entry
-                    latest_timestamp = entry.client_modified
-
-        return latest_file.path_lower if latest_file else None
-
-    except Exception as e:
-        print(f"Error getting latest file from {folder_path}: {e}")
-        return None
+def get_latest_files(entries: dict, conversion_dict: dict) -> dict:
+    # Map each handled folder to its newest file using the single recursive listing
+    latest_files = {}
+    for file_path, entry in entries.items():
+        folder_path = "/".join(file_path.split('/')[:-1])
+        folder_name = folder_path.split('/')[-1]
+
+        if folder_name not in conversion_dict:
+            continue
+
+        client_modified = datetime.fromisoformat(entry['client_modified'])
+        latest = latest_files.get(folder_path)
+        if latest is None or client_modified > latest['client_modified']:
+            latest_files[folder_path] = {
+                'file_path': file_path,
+                'folder_name': folder_name,
+                'content_hash': entry['content_hash'],
+                'client_modified': client_modified
+            }
+
+    return latest_files
+
+def process_latest_file(latest_file: dict, file_type_function, dbx):
+    content_hash = latest_file['content_hash']
+    if incremental_mode and latest_file['folder_name'] in CUMULATIVE_FOLDERS and content_hash in cache_state['processed']:
+        print(f"Skipping {latest_file['file_path']}, already in list cleaner")
+        return
+
+    file_type_function(latest_file['file_path'], dbx)
+    if content_hash not in cache_state['processed']:
+        cache_state['processed'].append(content_hash)
 
 def load_sheets(root_path, dbx, conversion_dict):
     try:
-        # List files and folders in the current path
-        response = dbx.files_list_folder(root_path)
-        for entry in response.entries:
-            if isinstance(entry, dropbox.files.FileMetadata):
-                file_path = entry.path_lower
-                folder_path = "/".join(file_path.split('/')[:-1])
-                folder_name = file_path.split('/')[:-1][-1]
-
-                # Check if valid folder name then get corresponding function per folder
-                if folder_name in conversion_dict:
-                    file_type_function = conversion_dict[folder_name]
-
-                    # Process the latest only
-                    if file_path == get_latest_file(folder_path, dbx):
-                        file_type_function(file_path, dbx)
-                        
-            elif isinstance(entry, dropbox.files.FolderMetadata):
-                load_sheets(entry.path_lower, dbx, conversion_dict)
-
-        # Handle pagination
-        while response.has_more:
-            response = dbx.files_list_folder_continue(response.cursor)
-            for entry in response.entries:
-                if isinstance(entry, dropbox.files.FileMetadata):
-                    file_path = entry.path_lower
-                    folder_path = "/".join(file_path.split('/')[:-1])
-                    folder_name = file_path.split('/')[:-1][-1]
-
-                    # Check if valid folder name then get corresponding function per folder
-                    if folder_name in conversion_dict:
-                        file_type_function = conversion_dict[folder_name]
-
-                        # Process the latest only
-                        if file_path == get_latest_file(folder_path, dbx):
-                            file_type_function(file_path, dbx)
-                            
-                elif isinstance(entry, dropbox.files.FolderMetadata):
-                    load_sheets(entry.path_lower, dbx, conversion_dict)
+        latest_files = get_latest_files(cache_state['entries'], conversion_dict)
+
+        # Process the latest file of each folder only
+        for folder_path in sorted(latest_files):
+            latest_file = latest_files[folder_path]
+            process_latest_file(latest_file, conversion_dict[latest_file['folder_name']], dbx)
 
     except dropbox.exceptions.ApiError as e:
         print(f"Error accessing path '{root_path}': {e}")
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
-def concat_contact_center_files(path: str, dbx):
-
-    result = dbx.files_list_folder(path)
-    contact_center_files = result.entries
-    df_list = []
-
-    for file in contact_center_files:
-        if isinstance(file, dropbox.files.FileMetadata):
-            file_path = file.path_lower
-            df = read_dropbox_file(file_path, dbx)
-            df_list.append(df)
-    
-    if df_list:
-        combined_df = pd.concat(df_list)
-        return combined_df
-    
-def concat_inbound_contact_history(path: str, dbx: dropbox.Dropbox):
-
-    result = dbx.files_list_folder(path)
-    inbound_contact_history_files = result.entries
-    df_list = []
-
-    for file in inbound_contact_history_files:
-        if isinstance(file, dropbox.files.FileMetadata):
-            file_path = file.path_lower
-            df = read_dropbox_file(file_path, dbx)
-            df_list.append(df)
-    
-    if df_list:
-        combined_df = pd.concat(df_list)
-        return combined_df
-
-    
-def concat_rc_files(path: str, dbx):
-
-    result = dbx.files_list_folder(path)
-    rc_files = result.entries
-    df_list = []
-
-    for file in rc_files:
-        if isinstance(file, dropbox.files.FileMetadata):
-            file_path = file.path_lower
-            df = read_dropbox_file(file_path, dbx)
-            df_list.append(df)
-    
-    if df_list:
-        combined_df = pd.concat(df_list)
-        return combined_df
-
-def concat_mvp_files(path: str, dbx):
-
-    result = dbx.files_list_folder(path)
-    mvp_files = result.entries
-    df_list = []
-
-    for file in mvp_files:
-        if isinstance(file, dropbox.files.FileMetadata):
-            file_path = file.path_lower
-            df = read_dropbox_file(file_path, dbx)
-            df_list.append(df)
-    
-    if df_list:
-        combined_df = pd.concat(df_list)
-        return combined_df
-    
-def concat_inbound_mvp_calls(path: str, dbx: dropbox.Dropbox):
-
-    result = dbx.files_list_folder(path)
-    inbound_mvp_call_files = result.entries
-    df_list = []
-
-    for file in inbound_mvp_call_files:
-        if isinstance(file, dropbox.files.FileMetadata):
-            file_path = file.path_lower
-            if file_path.endswith('.xlsx'):
-                metadata, response = dbx.files_download(file_path)
-                df = pd.read_excel(BytesIO(response.content), sheet_name='Calls')
-                df_list.append(df)
-    
-    if df_list:
-        combined_df = pd.concat(df_list)
-        return combined_df
-
-def concat_c3(path: str, dbx):
-
-    result = dbx.files_list_folder(path)
-    mvp_files = result.entries
-    df_list = []
-
-    for file in mvp_files:
-        if isinstance(file, dropbox.files.FileMetadata):
-            file_path = file.path_lower
-            df = read_dropbox_file(file_path, dbx)
-            df_list.append(df)
-    
-    if df_list:
-        combined_df = pd.concat(df_list)
-        return combined_df
-
 def create_local_list_cleaner(local_data_path: str, root_path: str, dbx: dropbox.Dropbox) -> None:
     global dnc_df, mvp_df, db_id_df, time_df, conv_df, pd_jr_aa_df
 
@@ -727,10 +602,15 @@ def create_local_list_cleaner(local_data_path: str, root_path: str, dbx: dropbox
     for sheet_name in sheet_names:
         dropbox_path = f"{root_path}/{sheet_name}.csv"
         local_file_path = f"{local_data_path}/{sheet_name}.csv"
-        metadata, response = dbx.files_download(dropbox_path)
+        dropbox_rev = cache_state['entries'].get(dropbox_path.lower(), {}).get('rev')
 
-        with open(local_file_path, 'wb') as f:
-            f.write(response.content)
+        # Reuse the local sheet if it is the same revision that was last uploaded
+        if not (incremental_mode and os.path.exists(local_file_path) and dropbox_rev
+                and cache_state['sheet_revs'].get(sheet_name) == dropbox_rev):
+            metadata, response = dbx.files_download(dropbox_path)
+
+            with open(local_file_path, 'wb') as f:
+                f.write(response.content)
 
         df = pd.read_csv(local_file_path, low_memory=False, header=None)
 
@@ -775,15 +655,22 @@ def drop_list_cleaner_dupes(file_path: str):
         for sheet_name, df in dataframes.items():
             df.to_excel(writer, sheet_name=sheet_name, index=False, header=None)
 
-def main(auth_code: str, app_window: ctk.CTkFrame):
+def main(auth_code: str, app_window: ctk.CTkFrame, incremental: bool = True):
 
     try:
-        dbx = dropbox.Dropbox(auth_code)
+        start_time = time.perf_counter()
+        dbx = ApiCallCounter(dropbox.Dropbox(auth_code))
 
         root_path = check_user_folder_paths(dbx)
-        global outbound_df_list, outbound_seven_days_list
+        global outbound_df_list, outbound_seven_days_list, cache_state, incremental_mode
         outbound_df_list = []
         outbound_seven_days_list = []
+
+        # Track Dropbox changes since the last update, a missing state means a full rebuild
+        cache_state = load_state(root_path)
+        incremental_mode = incremental and cache_state['cursor'] is not None
+        sync_source_entries(root_path, dbx, cache_state, incremental_mode)
+        print(f"Running {'incremental' if incremental_mode else 'full'} list cleaner update")
         
         # Create constant variables
         local_data_path = './data'
@@ -801,30 +688,32 @@ def main(auth_code: str, app_window: ctk.CTkFrame):
         create_local_list_cleaner(local_data_path, root_path, dbx)
 
         # Update the list cleaner file
+        load_start_time = time.perf_counter()
         load_sheets(root_path, dbx, conversion_dict)
+        print(f"Loaded latest exports in {time.perf_counter() - load_start_time:.1f}s ({dbx.summary()})")
 
         # Process c3 folder files
-        c3_df = concat_c3(f'{root_path}/c3', dbx)
+        c3_df = concat_folder_files(f'{root_path}/c3', dbx)
         add_c3(c3_df, dbx)
 
         # Process contact_center folder files
-        contact_center_df = concat_contact_center_files(f'{root_path}/contact_center', dbx)
+        contact_center_df = concat_folder_files(f'{root_path}/contact_center', dbx)
         add_contact_center(contact_center_df, dbx)
 
         # Process contact_history folder files
-        contact_history_df = concat_inbound_contact_history(f'{root_path}/contact_history', dbx)
+        contact_history_df = concat_folder_files(f'{root_path}/contact_history', dbx)
         add_contact_history_inbound(contact_history_df, dbx)
 
         # Process rc folder files
-        rc_df = concat_rc_files(f'{root_path}/rc', dbx)
+        rc_df = concat_folder_files(f'{root_path}/rc', dbx)
         add_rc(rc_df, dbx)
 
         # Process mvp folder files
-        mvp_df = concat_mvp_files(f'{root_path}/mvp', dbx)
+        mvp_df = concat_folder_files(f'{root_path}/mvp', dbx)
         add_mvp(mvp_df, dbx)
 
         # Process mvp_calls folder files
-        mvp_calls_df = concat_inbound_mvp_calls(f'{root_path}/mvp_calls', dbx)
+        mvp_calls_df = concat_folder_files(f'{root_path}/mvp_calls', dbx, parse_mvp_calls_file, extensions=('.xlsx',))
         add_mvp_calls_inbound(mvp_calls_df, dbx)
 
         # # Save all new sheets locally
@@ -839,6 +728,10 @@ def main(auth_code: str, app_window: ctk.CTkFrame):
         # Upload to dropbox
         export_to_dropbox(root_path, local_data_path, dbx)
 
+        # Save the cursor and processed hashes for the next incremental run
+        save_state(cache_state)
+        print(f"List cleaner update finished in {time.perf_counter() - start_time:.1f}s ({dbx.summary()})")
+
         # Update label
         update_latest_cleaner_file_label(app_window, dbx)
     
@@ -3,15 +3,24 @@ import re
 import pandas as pd
 import warnings
 import dropbox
+import numpy as np
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from urllib.parse import quote
+from sqlalchemy import text
+from concurrent.futures import ThreadPoolExecutor
+from .phone_index import PHONE_SHEETS, ID_SHEET, load_sheet_index, download_sheet, isin_index
+from .cm_cache import CACHE_OVERLAP, load_cm_cache, save_cm_cache, to_phone_array
+from tools.shared.database import get_engine
 
 warnings.simplefilter(action='ignore', category=pd.errors.SettingWithCopyWarning)
 
+# CSV lists above this size are cleaned in chunks to keep memory bounded
+STREAMING_THRESHOLD_BYTES = 200 * 1024 * 1024
+CHUNKSIZE = 250_000
+
 disposition_query = """
 SELECT
-	dnis_to
+	dnis_to,
+	MAX(start_time) AS last_start_time
 FROM
 	max_outbound_calls
 WHERE
@@ -26,27 +35,28 @@ WHERE
 		'Proactive Identified - Answering Machine Left Message',
 		'Answering Machine Left Message'
 	)
+	{start_filter}
 GROUP BY
 	dnis_to
 """
 
 six_months_query = """
-WITH ranked_calls AS (
-    SELECT
-        dnis_to,
-        ROW_NUMBER() OVER (PARTITION BY dnis_to ORDER BY start_time DESC) AS date_rank
-    FROM
-        max_outbound_calls
-    WHERE
-        primary_disposition IN ('Lead Not interested', 'Uncooperative Lead')
-        AND start_time BETWEEN DATE_ADD(CURRENT_DATE, INTERVAL -6 MONTH) AND CURRENT_DATE
-)
 SELECT
-    dnis_to
+    dnis_to,
+    MAX(start_time) AS last_start_time
 FROM
-    ranked_calls
+    max_outbound_calls
 WHERE
-    date_rank = 1;
+    primary_disposition IN ('Lead Not interested', 'Uncooperative Lead')
+    AND start_time BETWEEN :start_time AND :end_time
+GROUP BY
+    dnis_to
+"""
+
+date_bounds_query = """
+SELECT
+    CURRENT_DATE AS today,
+    DATE_ADD(CURRENT_DATE, INTERVAL -6 MONTH) AS six_months_ago
 """
 
 def extract_list_cleaner_file(auth_code: str, local_path: str, dropbox_path: str):
@@ -70,48 +80,95 @@ def download_list_cleaner(auth_code: str) -> None:
         "PDJRAADups (PD)"
     ]
 
+    dbx = dropbox.Dropbox(auth_code)
     for sheet_name in sheet_names:
-        dropbox_path = f"/List Cleaner & JC DNC/{sheet_name}.csv"
-        local_file_path = f"./data/{sheet_name}.csv"
-        dbx = dropbox.Dropbox(auth_code)
-        metadata, response = dbx.files_download(dropbox_path)
+        download_sheet(dbx, sheet_name)
+
+def get_disposition_phones(engine) -> np.ndarray:
 
-        with open(local_file_path, 'wb') as f:
-            f.write(response.content)
+    cache = load_cm_cache('dispositions', disposition_query)
 
-def read_cm_live_db() -> 'tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame | None]':
+    if cache is None:
+        print("Fetching all dispositions")
+        disposition_df = pd.read_sql_query(text(disposition_query.format(start_filter='')), engine)
+        cached_phones = np.empty(0, dtype='int64')
+        high_water_mark = None
+        refreshed_at = None
+    else:
+        query = disposition_query.format(start_filter='AND start_time >= :start_time')
+        disposition_df = pd.read_sql_query(text(query), engine, params={'start_time': (cache['high_water_mark'] - CACHE_OVERLAP).to_pydatetime()})
+        cached_phones = cache['phones']
+        high_water_mark = cache['high_water_mark']
+        refreshed_at = cache['refreshed_at']
+
+    # Dispositions only ever add phones, so new rows are merged into the cached set
+    phones = np.union1d(cached_phones, to_phone_array(disposition_df['dnis_to']))
+    latest_start_time = pd.to_datetime(disposition_df['last_start_time']).max()
+    if pd.notna(latest_start_time):
+        high_water_mark = max(high_water_mark, latest_start_time) if high_water_mark is not None else latest_start_time
+
+    save_cm_cache('dispositions', disposition_query, {'phones': phones}, high_water_mark, refreshed_at)
+    return phones
+
+def get_six_months_phones(engine, today: pd.Timestamp, six_months_ago: pd.Timestamp) -> np.ndarray:
+
+    cache = load_cm_cache('six_months', six_months_query)
+
+    if cache is None:
+        print("Fetching six months of dispositions")
+        start_time = six_months_ago
+        cached_df = pd.DataFrame({'dnis_to': np.empty(0, dtype='int64'), 'last_start_time': np.empty(0, dtype='datetime64[s]')})
+        refreshed_at = None
+    else:
+        start_time = max(six_months_ago, cache['high_water_mark'] - CACHE_OVERLAP)
+        cached_df = pd.DataFrame({'dnis_to': cache['phones'], 'last_start_time': cache['last_start_times']})
+        refreshed_at = cache['refreshed_at']
+
+    six_months_df = pd.read_sql_query(text(six_months_query), engine, params={'start_time': start_time.to_pydatetime(), 'end_time': today.to_pydatetime()})
+    six_months_df['dnis_to'] = pd.to_numeric(six_months_df['dnis_to'], errors='coerce')
+    six_months_df = six_months_df.dropna(subset=['dnis_to'])
+
+    # Keep the latest call per phone and drop phones whose latest call left the window
+    merged_df = pd.concat([
+        cached_df,
+        pd.DataFrame({
+            'dnis_to': six_months_df['dnis_to'].to_numpy(dtype='int64'),
+            'last_start_time': pd.to_datetime(six_months_df['last_start_time']).to_numpy(dtype='datetime64[s]')
+        })
+    ], ignore_index=True)
+    merged_df = merged_df.groupby('dnis_to', sort=True)['last_start_time'].max().reset_index()
+    merged_df = merged_df[merged_df['last_start_time'] >= six_months_ago]
+
+    arrays = {
+        'phones': merged_df['dnis_to'].to_numpy(dtype='int64'),
+        'last_start_times': merged_df['last_start_time'].to_numpy(dtype='datetime64[s]')
+    }
+    save_cm_cache('six_months', six_months_query, arrays, today, refreshed_at)
+    return arrays['phones']
+
+def read_cm_live_db() -> 'tuple[np.ndarray, np.ndarray]':
 
     try:
-        # Create database engine
-        host = os.getenv('DB_HOST')
-        user = os.getenv('DB_USER')
-        name = os.getenv('DB_NAME')
-        password = os.getenv('DB_PASSWORD')
-        engine = create_engine(f'mysql+pymysql://{user}:{quote(password)}@{host}/{name}')
+        engine = get_engine()
 
         print(f'Reading Community Minerals Database')
 
-        disposition_df = pd.read_sql_query(disposition_query, engine)
-        six_months_df = pd.read_sql_query(six_months_query, engine)
-
-        disposition_df['dnis_to'] = pd.to_numeric(disposition_df['dnis_to'], errors='coerce')
-        disposition_df['dnis_to'] = disposition_df['dnis_to'].astype('Int64')
-        disposition_set = set(disposition_df.loc[disposition_df['dnis_to'].notna(), 'dnis_to'].map(int))
+        # Window bounds come from the database so they match its CURRENT_DATE
+        date_bounds_df = pd.read_sql_query(text(date_bounds_query), engine)
+        today = pd.Timestamp(date_bounds_df['today'].iloc[0])
+        six_months_ago = pd.Timestamp(date_bounds_df['six_months_ago'].iloc[0])
 
-        six_months_df['dnis_to'] = pd.to_numeric(six_months_df['dnis_to'], errors='coerce')
-        six_months_df['dnis_to'] = six_months_df['dnis_to'].astype('Int64')
-        months_set = set(six_months_df.loc[six_months_df['dnis_to'].notna(), 'dnis_to'].map(int))
-
-        return disposition_set, months_set
+        # Both refreshes are independent and run on separate pooled connections
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            disposition_future = executor.submit(get_disposition_phones, engine)
+            months_future = executor.submit(get_six_months_phones, engine, today, six_months_ago)
+            return disposition_future.result(), months_future.result()
 
     except Exception as e:
         raise RuntimeError(f"An error occurred while reading from the database: {e}")
 
-    finally:
-        engine.dispose()
-
 
-def export_output(df: pd.DataFrame, file_path: str, save_path: str) -> None:
+def export_output(df: pd.DataFrame, file_path: str, save_path: str, append: bool = False) -> None:
 
     # Capitalization of all names
     columns_to_transform = ['Owner','Combined Name', 'First Name', 'Middle Name', 'Last Name']
@@ -119,7 +176,7 @@ def export_output(df: pd.DataFrame, file_path: str, save_path: str) -> None:
 
     filename = os.path.basename(file_path)
     if filename.endswith('.csv'):
-        df.to_csv(f"{save_path}/(Clean file) {filename}", index=False)
+        df.to_csv(f"{save_path}/(Clean file) {filename}", index=False, mode='a' if append else 'w', header=not append)
     
     elif filename.endswith('.xlsx'):
         df.to_excel(f"{save_path}/(Clean file) {filename}", index=False)
@@ -130,7 +187,7 @@ def export_output(df: pd.DataFrame, file_path: str, save_path: str) -> None:
     else:
         print("No output generated. Invalid file format")
 
-def export_reclean_output(df: pd.DataFrame, file_path: str, save_path: str) -> None:
+def export_reclean_output(df: pd.DataFrame, file_path: str, save_path: str, append: bool = False) -> None:
 
     # Capitalization of all names
     columns_to_transform = ['Owner', 'First Name']
@@ -138,7 +195,7 @@ def export_reclean_output(df: pd.DataFrame, file_path: str, save_path: str) -> N
 
     filename = os.path.basename(file_path)
     if filename.endswith('.csv'):
-        df.to_csv(f"{save_path}/(Re-clean file) {filename}", index=False)
+        df.to_csv(f"{save_path}/(Re-clean file) {filename}", index=False, mode='a' if append else 'w', header=not append)
     
     elif filename.endswith('.xlsx'):
         df.to_excel(f"{save_path}/(Re-clean file) {filename}", index=False)
@@ -163,45 +220,57 @@ def read_file(path: str):
     else:
         raise ValueError("Invalid file format: Please provide a .csv, .xlsx or .xlsb file.")
     
-def is_valid_phone(phone):
-    return bool(re.fullmatch(r'\d{10,15}', phone))
-
 def remove_phone_dupes(df: pd.DataFrame) -> pd.DataFrame:
 
-    df['original_index'] = df.index
     phone_columns = ['phone1', 'phone2', 'phone3', 'phone4', 'phone5']
-    sorted_df = df.sort_values(by=phone_columns, ascending=False)
-
+    row_count = len(df)
+    slot_count = len(phone_columns)
+
+    # Long (slot, row) layout of all phones, factorized so equal phones share a code
+    long_phones = pd.concat([df[phone] for phone in phone_columns], ignore_index=True)
+    codes, uniques = pd.factorize(long_phones, sort=True)
+    codes = codes.astype('int64')
+    unique_count = len(uniques)
+    valid = codes >= 0
+    slots = np.repeat(np.arange(slot_count), row_count)
+
+    # Rank rows as sorting by phone1..phone5 descending with blanks last does
+    sort_keys = np.where(valid, unique_count - 1 - codes, unique_count).reshape(slot_count, row_count)
+    row_order = np.lexsort(sort_keys[::-1])
+
+    # Within a column, keep the last occurrence of each phone in that ranking
+    keep = np.zeros((slot_count, row_count), dtype=bool)
+    for slot in range(slot_count):
+        keep[slot, row_order] = ~pd.Series(sort_keys[slot, row_order]).duplicated(keep='last').to_numpy()
+    keep = keep.ravel() & valid
+
+    # Across columns, keep a phone only in the lowest column it appears in
+    first_slot = np.full(unique_count, slot_count)
+    np.minimum.at(first_slot, codes[valid], slots[valid])
+    keep[valid] &= slots[valid] == first_slot[codes[valid]]
+
+    blank = (valid & ~keep).reshape(slot_count, row_count)
+    deduped_df = df.copy()
+    for slot, phone in enumerate(phone_columns):
+        deduped_df.loc[blank[slot], phone] = pd.NA
+
+    return deduped_df.sort_index(kind='stable')
+
+def remove_seen_phones(df: pd.DataFrame, seen_phones: np.ndarray) -> 'tuple[pd.DataFrame, np.ndarray]':
+
+    # Blank phones already kept in an earlier chunk so each phone is kept at most once per file
+    phone_columns = ['phone1', 'phone2', 'phone3', 'phone4', 'phone5']
     for phone in phone_columns:
-        sorted_df.loc[(sorted_df[phone].notna()) & (sorted_df[phone].duplicated(keep='last')), phone] = pd.NA
-    
-    phone_filter_mask = (sorted_df['phone5'].isin(sorted_df['phone2'])) \
-    | (sorted_df['phone5'].isin(sorted_df['phone3'])) \
-    | (sorted_df['phone5'].isin(sorted_df['phone4'])) \
-    | (sorted_df['phone5'].isin(sorted_df['phone1']))
-    sorted_df.loc[(sorted_df['phone5'].notna()) & (phone_filter_mask), 'phone5'] = pd.NA
-
-    phone_filter_mask = (sorted_df['phone4'].isin(sorted_df['phone3'])) \
-    | (sorted_df['phone4'].isin(sorted_df['phone2'])) \
-    | (sorted_df['phone4'].isin(sorted_df['phone1']))
-    sorted_df.loc[(sorted_df['phone4'].notna()) & (phone_filter_mask), 'phone4'] = pd.NA
-
-    phone_filter_mask = (sorted_df['phone3'].isin(sorted_df['phone2'])) \
-    | (sorted_df['phone3'].isin(sorted_df['phone1']))
-    sorted_df.loc[(sorted_df['phone3'].notna()) & (phone_filter_mask), 'phone3'] = pd.NA
-
-    phone_filter_mask = (sorted_df['phone2'].isin(sorted_df['phone1']))
-    sorted_df.loc[(sorted_df['phone2'].notna()) & (phone_filter_mask), 'phone2'] = pd.NA
-            
-    sorted_df = sorted_df.sort_values(by='original_index')
-    sorted_df = sorted_df.drop(columns='original_index')
-    return sorted_df
-
-def clean_contact_id_deal_id(df: pd.DataFrame, id_set: set) -> pd.DataFrame:
+        df.loc[isin_index(df[phone], [seen_phones]), phone] = pd.NA
+
+    kept_phones = pd.concat([df[phone] for phone in phone_columns]).dropna().to_numpy(dtype='int64')
+    return df, np.union1d(seen_phones, kept_phones)
+
+def clean_contact_id_deal_id(df: pd.DataFrame, id_index: np.ndarray) -> pd.DataFrame:
 
     if 'contact_id' in df.columns:
         df['contact_id'] = df['contact_id'].apply(pd.to_numeric, errors='coerce').astype('Int64')
-        df = df[~df['contact_id'].isin(id_set)]
+        df = df[~isin_index(df['contact_id'], [id_index])]
     
     if 'Deal ID' in df.columns:
         df = df[df['Deal ID'].isna()]
@@ -210,41 +279,24 @@ def clean_contact_id_deal_id(df: pd.DataFrame, id_set: set) -> pd.DataFrame:
 
     return final_df
 
-def get_phone_set() -> tuple[set, set]:
-
-    data_path = './data'
+def get_phone_indexes() -> 'tuple[list[np.ndarray], list[np.ndarray]]':
 
-    # Initial cleaning phone set
-    file_list = [
-        "CCM+CH+MVPC+MVPT+JC+RC+PD (Cold).csv",
-        "DNC (Cold-PD).csv",
-        "CallOut-14d+TextOut-30d (Cold).csv",
-        "CallTextOut-7d (PD).csv",
-        "PDConvDup (PD).csv",
-        "PDJRAADups (PD).csv"
-    ]
-    final_list_cleaner_df = pd.concat([pd.read_csv(os.path.join(data_path, file), low_memory=False, header=None) for file in file_list], ignore_index=True)
-    valid_phone_set = set(int(phone) for phone in map(str, final_list_cleaner_df[0].tolist()) if is_valid_phone(phone))
+    # Initial cleaning phone indexes
+    valid_phone_indexes = [load_sheet_index(sheet_name) for sheet_name in PHONE_SHEETS]
 
-    # Recleaning phone set
+    # Recleaning phone indexes
     recleaning_list = [
-        "CCM+CH+MVPC+MVPT+JC+RC+PD (Cold).csv",
-        "DNC (Cold-PD).csv",
-        "PDConvDup (PD).csv",
-        "PDJRAADups (PD).csv"
+        "CCM+CH+MVPC+MVPT+JC+RC+PD (Cold)",
+        "DNC (Cold-PD)",
+        "PDConvDup (PD)",
+        "PDJRAADups (PD)"
     ]
-    final_list_recleaner_df = pd.concat([pd.read_csv(os.path.join(data_path, file), low_memory=False, header=None) for file in recleaning_list], ignore_index=True)
-    valid_phone_reclean_set = set(int(phone) for phone in map(str, final_list_recleaner_df[0].tolist()) if is_valid_phone(phone))
-    
-    return valid_phone_set, valid_phone_reclean_set
+    valid_phone_reclean_indexes = [valid_phone_indexes[PHONE_SHEETS.index(sheet_name)] for sheet_name in recleaning_list]
 
-def get_id_set() -> set:
+    return valid_phone_indexes, valid_phone_reclean_indexes
 
-    unique_db_df = pd.read_csv('./data/UniqueDB ID (Cold).csv', low_memory=False)
-    valid_numbers = pd.to_numeric(unique_db_df['Deal - Unique Database ID'], errors='coerce')
-    valid_numbers = valid_numbers.dropna().astype(int)
-    valid_id_set = set(valid_numbers)
-    return valid_id_set
+def get_id_index() -> np.ndarray:
+    return load_sheet_index(ID_SHEET)
 
 def upper_first(text):
     if pd.isna(text):
@@ -252,11 +304,11 @@ def upper_first(text):
     words = text.split()
     return " ".join([word.title() if not re.fullmatch(r'(?i)(i{1,3}|iv|v?i{0,3}|ix|x{1,3}|xl|l{1,3}|xc|c{1,3}|cd|d{1,3}|cm|m{1,4})', word) else word.upper() for word in words])
 
-def export_text_marketing(df: pd.DataFrame, file_path: str, save_path: str):
+def export_text_marketing(df: pd.DataFrame, file_path: str, save_path: str, append: bool = False):
 
     filename = os.path.basename(file_path)
     if filename.endswith('.csv'):
-        df.to_csv(f"{save_path}/(Autodialer - Text Marketing) {filename}", index=False)
+        df.to_csv(f"{save_path}/(Autodialer - Text Marketing) {filename}", index=False, mode='a' if append else 'w', header=not append)
     
     elif filename.endswith('.xlsx'):
         df.to_excel(f"{save_path}/(Autodialer - Text Marketing) {filename}", index=False)
@@ -328,54 +380,105 @@ def text_marketing_melt(df: pd.DataFrame):
 
     return export_df
 
-def main(auth_code: str, list_files: tuple, save_path: str, run_mode: str):
+def clean_list_df(list_df: pd.DataFrame, valid_phone_indexes: list, valid_id_index: np.ndarray, disposition_phones: np.ndarray, months_phones: np.ndarray, seen_phones: 'np.ndarray | None' = None) -> 'tuple[pd.DataFrame, np.ndarray | None]':
+
+    # Convert phone numbers to int
+    phone_columns = ['phone1', 'phone2', 'phone3', 'phone4', 'phone5']
+    list_df[phone_columns] = (
+        list_df[phone_columns]
+        .apply(pd.to_numeric, errors='coerce')
+        .astype('Int64')
+    )
+
+    # Search phones in cleaner file
+    output_df = list_df[~isin_index(list_df[phone_columns], valid_phone_indexes).any(axis=1)]
+
+    # Remove Company contact type
+    column_name = next((col for col in output_df.columns if col.strip().lower() == 'contact_type'), None)
+    if column_name:
+        output_df = output_df[output_df[column_name].astype('string').str.lower().fillna('') != 'company']
+    
+    # Remove duplicates
+    removed_dupes_df = remove_phone_dupes(output_df)
+    if seen_phones is not None:
+        removed_dupes_df, seen_phones = remove_seen_phones(removed_dupes_df, seen_phones)
+
+    # Clean df based on contact id and deal id
+    clean_contact_deal_df = clean_contact_id_deal_id(removed_dupes_df, valid_id_index)
+
+    # Check if has existing dispositions
+    clean_dispo_df = clean_contact_deal_df[~isin_index(clean_contact_deal_df[phone_columns], [disposition_phones]).any(axis=1)]
+
+    # Check if within 6 months for specific dispositions
+    final_df = clean_dispo_df[~isin_index(clean_dispo_df[phone_columns], [months_phones]).any(axis=1)]
+
+    return final_df, seen_phones
+
+def is_streaming_file(list_file: str, streaming: 'bool | None') -> bool:
+    if not list_file.endswith('.csv'):
+        return False
+
+    if streaming is None:
+        return os.path.getsize(list_file) > STREAMING_THRESHOLD_BYTES
+
+    return streaming
+
+def stream_list_file(list_file: str, save_path: str, run_mode: str, valid_phone_indexes: list, valid_reclean_phone_indexes: list, valid_id_index: np.ndarray, disposition_phones: np.ndarray, months_phones: np.ndarray) -> None:
+
+    seen_phones = np.empty(0, dtype='int64')
+
+    # Chunks infer dtypes on their own, text and phone columns are pinned so an all blank chunk still reads as text
+    columns = pd.read_csv(list_file, nrows=0).columns
+    text_columns = ['phone1', 'phone2', 'phone3', 'phone4', 'phone5', 'Phone Number']
+    dtype = {column: str for column in columns if column in text_columns or column.strip().lower() == 'contact_type'}
+
+    for chunk_number, chunk_df in enumerate(pd.read_csv(list_file, chunksize=CHUNKSIZE, dtype=dtype)):
+
+        print(f"Processing rows {chunk_number * CHUNKSIZE + 1} to {chunk_number * CHUNKSIZE + len(chunk_df)}")
+        append = chunk_number > 0
+
+        if run_mode == 'recleaning':
+            chunk_df['Phone Number'] = chunk_df['Phone Number'].apply(pd.to_numeric, errors='coerce').astype('Int64')
+            recleaning_df = chunk_df[~isin_index(chunk_df['Phone Number'], valid_reclean_phone_indexes)]
+            export_reclean_output(recleaning_df, list_file, save_path, append)
+            continue
+
+        final_df, seen_phones = clean_list_df(chunk_df, valid_phone_indexes, valid_id_index, disposition_phones, months_phones, seen_phones)
+
+        if run_mode == 'text_marketing':
+            text_marketing_df = text_marketing_melt(final_df)
+            export_text_marketing(text_marketing_df, list_file, save_path, append)
+        else:
+            export_output(final_df, list_file, save_path, append)
+
+def main(auth_code: str, list_files: tuple, save_path: str, run_mode: str, streaming: 'bool | None' = None):
 
     try:
         download_list_cleaner(auth_code)
 
-        valid_phone_set, valid_reclean_phone_set = get_phone_set()
-        valid_id_set = get_id_set()
-        disposition_set, months_set = read_cm_live_db()
+        valid_phone_indexes, valid_reclean_phone_indexes = get_phone_indexes()
+        valid_id_index = get_id_index()
+        disposition_phones, months_phones = read_cm_live_db()
         
         for list_file in list_files:
 
             print(f"Processing file {os.path.basename(list_file)}")
+
+            # Large CSV lists are cleaned chunk by chunk and written out incrementally
+            if is_streaming_file(list_file, streaming):
+                stream_list_file(list_file, save_path, run_mode, valid_phone_indexes, valid_reclean_phone_indexes, valid_id_index, disposition_phones, months_phones)
+                continue
+
             list_df = read_file(list_file)
 
             # Run recleaning
             if run_mode == 'recleaning':
                 list_df['Phone Number'] = list_df['Phone Number'].apply(pd.to_numeric, errors='coerce').astype('Int64')
-                recleaning_df = list_df[~list_df['Phone Number'].isin(valid_reclean_phone_set)]
+                recleaning_df = list_df[~isin_index(list_df['Phone Number'], valid_reclean_phone_indexes)]
                 export_reclean_output(recleaning_df, list_file, save_path)
                 continue
 
-            # Convert phone numbers to int
-            phone_columns = ['phone1', 'phone2', 'phone3', 'phone4', 'phone5']
-            list_df[phone_columns] = (
-                list_df[phone_columns]
-                .apply(pd.to_numeric, errors='coerce')
-                .astype('Int64')
-            )
-
-            # Search phones in cleaner file
-            output_df = list_df[~list_df[phone_columns].isin(valid_phone_set).any(axis=1)]
-
-            # Remove Company contact type
-            column_name = next((col for col in output_df.columns if col.strip().lower() == 'contact_type'), None)
-            if column_name:
-                output_df = output_df[output_df[column_name].str.lower() != 'company']
-            
-            # Remove duplicates
-            removed_dupes_df = remove_phone_dupes(output_df)
-
-            # Clean df based on contact id and deal id
-            clean_contact_deal_df = clean_contact_id_deal_id(removed_dupes_df, valid_id_set)
-
-            # Check if has existing dispositions
-            clean_dispo_df = clean_contact_deal_df[~clean_contact_deal_df[phone_columns].isin(disposition_set).any(axis=1)]
-
-            # Check if within 6 months for specific dispositions
-            final_df = clean_dispo_df[~clean_dispo_df[phone_columns].isin(months_set).any(axis=1)]
+            final_df, _ = clean_list_df(list_df, valid_phone_indexes, valid_id_index, disposition_phones, months_phones)
 
             if run_mode == 'text_marketing':
                 text_marketing_df = text_marketing_melt(final_df)
@@ -0,0 +1,73 @@
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+CACHE_PATH = './data/cm_cache'
+META_PATH = './data/cm_cache/meta.json'
+
+# Full rescan cadence, catches rows that were changed after they were first cached
+FULL_REFRESH_DAYS = 7
+
+# Incremental reads start this far before the high-water mark to pick up late dispositions
+CACHE_OVERLAP = timedelta(days=1)
+
+# Caches are refreshed concurrently and share one meta file
+meta_lock = threading.Lock()
+
+def get_query_hash(query: str) -> str:
+    return hashlib.sha1(query.encode('utf-8')).hexdigest()
+
+def read_meta() -> dict:
+    if not os.path.exists(META_PATH):
+        return {}
+
+    with open(META_PATH, 'r') as f:
+        return json.load(f)
+
+def load_cm_cache(name: str, query: str) -> 'dict | None':
+
+    with meta_lock:
+        entry = read_meta().get(name)
+    cache_file = os.path.join(CACHE_PATH, f"{name}.npz")
+    if not entry or not entry.get('high_water_mark') or not os.path.exists(cache_file):
+        return None
+
+    # A changed query or an old full refresh means the cache has to be rebuilt
+    if entry.get('query_hash') != get_query_hash(query):
+        return None
+    if datetime.now() - datetime.fromisoformat(entry['refreshed_at']) > timedelta(days=FULL_REFRESH_DAYS):
+        return None
+
+    with np.load(cache_file) as arrays:
+        cache = {key: arrays[key] for key in arrays.files}
+
+    cache['high_water_mark'] = pd.Timestamp(entry['high_water_mark'])
+    cache['refreshed_at'] = entry['refreshed_at']
+    return cache
+
+def save_cm_cache(name: str, query: str, arrays: dict, high_water_mark: 'pd.Timestamp | None', refreshed_at: 'str | None' = None) -> None:
+
+    os.makedirs(CACHE_PATH, exist_ok=True)
+    np.savez(os.path.join(CACHE_PATH, f"{name}.npz"), **arrays)
+
+    with meta_lock:
+        meta = read_meta()
+        meta[name] = {
+            'query_hash': get_query_hash(query),
+            'high_water_mark': high_water_mark.isoformat() if high_water_mark is not None else None,
+            'refreshed_at': refreshed_at or datetime.now().isoformat(timespec='seconds'),
+            'rows': int(len(arrays['phones']))
+        }
+
+        # Swapped in whole so a reader never sees a half written file
+        with open(f"{META_PATH}.tmp", 'w') as f:
+            json.dump(meta, f, indent=4)
+        os.replace(f"{META_PATH}.tmp", META_PATH)
+
+def to_phone_array(phones: pd.Series) -> np.ndarray:
+    phones = pd.to_numeric(phones, errors='coerce').dropna()
+    return phones.to_numpy(dtype='int64')
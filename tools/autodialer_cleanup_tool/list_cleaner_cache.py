@@ -0,0 +1,126 @@
+import os
+import json
+import threading
+import dropbox
+from collections import Counter
+
+CACHE_PATH = './data/list_cleaner_cache'
+FILES_PATH = './data/list_cleaner_cache/files'
+STATE_PATH = './data/list_cleaner_cache/state.json'
+
+class ApiCallCounter:
+    # Wraps a Dropbox client and counts the files_* API calls made through it
+    def __init__(self, dbx: dropbox.Dropbox):
+        self._dbx = dbx
+        self._lock = threading.Lock()
+        self.calls = Counter()
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._dbx, name)
+        if not name.startswith('files_'):
+            return attribute
+
+        def counted_call(*args, **kwargs):
+            with self._lock:
+                self.calls[name] += 1
+            return attribute(*args, **kwargs)
+
+        return counted_call
+
+    def summary(self) -> str:
+        if not self.calls:
+            return "no Dropbox API calls"
+        return "Dropbox API calls: " + ", ".join(f"{name}={count}" for name, count in sorted(self.calls.items()))
+
+def new_state(root_path: str) -> dict:
+    return {
+        'root_path': root_path,
+        'cursor': None,
+        'entries': {},
+        'processed': [],
+        'sheet_revs': {}
+    }
+
+def load_state(root_path: str) -> dict:
+    if not os.path.exists(STATE_PATH):
+        return new_state(root_path)
+
+    with open(STATE_PATH, 'r') as f:
+        state = json.load(f)
+
+    # A different root folder invalidates the saved cursor and hashes
+    if state.get('root_path') != root_path:
+        return new_state(root_path)
+
+    return state
+
+def save_state(state: dict) -> None:
+    os.makedirs(CACHE_PATH, exist_ok=True)
+
+    # Drop processed hashes and cached files of sources that no longer exist
+    live_hashes = {entry['content_hash'] for entry in state['entries'].values()}
+    state['processed'] = [content_hash for content_hash in state['processed'] if content_hash in live_hashes]
+    if os.path.isdir(FILES_PATH):
+        for file_name in os.listdir(FILES_PATH):
+            if file_name not in live_hashes:
+                os.remove(os.path.join(FILES_PATH, file_name))
+
+    with open(STATE_PATH, 'w') as f:
+        json.dump(state, f, indent=4)
+
+def entry_to_dict(entry: dropbox.files.FileMetadata) -> dict:
+    return {
+        'content_hash': entry.content_hash,
+        'rev': entry.rev,
+        'client_modified': entry.client_modified.isoformat()
+    }
+
+def sync_source_entries(root_path: str, dbx: dropbox.Dropbox, state: dict, incremental: bool) -> dict:
+    result = None
+
+    if incremental and state['cursor']:
+        try:
+            result = dbx.files_list_folder_continue(state['cursor'])
+            print("Fetching list cleaner changes since last update")
+        except dropbox.exceptions.ApiError:
+            print("Saved Dropbox cursor has expired, listing all list cleaner files")
+
+    if result is None:
+        state['entries'] = {}
+        result = dbx.files_list_folder(root_path, recursive=True)
+
+    while True:
+        for entry in result.entries:
+            if isinstance(entry, dropbox.files.FileMetadata):
+                state['entries'][entry.path_lower] = entry_to_dict(entry)
+
+            elif isinstance(entry, dropbox.files.DeletedMetadata):
+                # Deleted entries can be files or whole folders
+                for path in list(state['entries']):
+                    if path == entry.path_lower or path.startswith(f"{entry.path_lower}/"):
+                        del state['entries'][path]
+
+        if not result.has_more:
+            break
+        result = dbx.files_list_folder_continue(result.cursor)
+
+    state['cursor'] = result.cursor
+    return state['entries']
+
+def download_file(path: str, dbx: dropbox.Dropbox, content_hash: 'str | None' = None) -> bytes:
+    # Reuse the local copy when the Dropbox content hash is unchanged
+    if content_hash:
+        cached_path = os.path.join(FILES_PATH, content_hash)
+        if os.path.exists(cached_path):
+            with open(cached_path, 'rb') as f:
+                return f.read()
+
+    metadata, response = dbx.files_download(path)
+    content = response.content
+
+    if metadata.content_hash:
+        os.makedirs(FILES_PATH, exist_ok=True)
+        with open(os.path.join(FILES_PATH, metadata.content_hash), 'wb') as f:
+            f.write(content)
+
+    return content
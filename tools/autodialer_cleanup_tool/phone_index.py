@@ -0,0 +1,153 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+DATA_PATH = './data'
+INDEX_PATH = './data/phone_index'
+MANIFEST_PATH = './data/phone_index/manifest.json'
+
+# List cleaner sheets that hold phone numbers
+PHONE_SHEETS = [
+    "CCM+CH+MVPC+MVPT+JC+RC+PD (Cold)",
+    "DNC (Cold-PD)",
+    "CallOut-14d+TextOut-30d (Cold)",
+    "CallTextOut-7d (PD)",
+    "PDConvDup (PD)",
+    "PDJRAADups (PD)"
+]
+
+# List cleaner sheet that holds the Unique Database IDs
+ID_SHEET = "UniqueDB ID (Cold)"
+
+INDEXED_SHEETS = PHONE_SHEETS + [ID_SHEET]
+
+def read_manifest() -> dict:
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+
+    with open(MANIFEST_PATH, 'r') as f:
+        return json.load(f)
+
+def write_manifest(manifest: dict) -> None:
+    os.makedirs(INDEX_PATH, exist_ok=True)
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=4)
+
+def get_source_signature(sheet_name: str) -> dict:
+    stat = os.stat(os.path.join(DATA_PATH, f"{sheet_name}.csv"))
+    return {'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns}
+
+def is_index_current(sheet_name: str, manifest: dict) -> bool:
+    entry = manifest.get(sheet_name)
+    if not entry or not os.path.exists(os.path.join(INDEX_PATH, f"{sheet_name}.npy")):
+        return False
+
+    try:
+        signature = get_source_signature(sheet_name)
+    except FileNotFoundError:
+        return False
+
+    return all(entry.get(key) == value for key, value in signature.items())
+
+def parse_sheet_values(sheet_name: str, values: pd.Series) -> np.ndarray:
+    if sheet_name == ID_SHEET:
+        ids = pd.to_numeric(values, errors='coerce').dropna()
+        return ids.to_numpy(dtype='int64')
+
+    # Same validation as the old set build: 10 to 15 digits only
+    values = values[values.str.fullmatch(r'\d{10,15}', na=False)]
+    return pd.to_numeric(values).to_numpy(dtype='int64')
+
+def read_sheet_values(sheet_name: str) -> np.ndarray:
+    try:
+        values = pd.read_csv(os.path.join(DATA_PATH, f"{sheet_name}.csv"), header=None, usecols=[0], dtype=str)[0]
+    except pd.errors.EmptyDataError:
+        return np.empty(0, dtype='int64')
+
+    return parse_sheet_values(sheet_name, values)
+
+def build_sheet_index(sheet_name: str, values: 'pd.Series | None' = None) -> np.ndarray:
+    # Values already in memory are converted the same way the CSV writer renders them
+    if values is None:
+        sheet_values = read_sheet_values(sheet_name)
+    else:
+        sheet_values = parse_sheet_values(sheet_name, values.dropna().astype(str))
+
+    sorted_values = np.unique(sheet_values)
+    os.makedirs(INDEX_PATH, exist_ok=True)
+    np.save(os.path.join(INDEX_PATH, f"{sheet_name}.npy"), sorted_values)
+
+    manifest = read_manifest()
+    manifest[sheet_name] = {
+        'rows': int(sorted_values.size),
+        'built_at': datetime.now().isoformat(timespec='seconds'),
+        **get_source_signature(sheet_name)
+    }
+    write_manifest(manifest)
+
+    return sorted_values
+
+def load_sheet_index(sheet_name: str) -> np.ndarray:
+    if is_index_current(sheet_name, read_manifest()):
+        return np.load(os.path.join(INDEX_PATH, f"{sheet_name}.npy"), mmap_mode='r')
+
+    print(f"Building index for {sheet_name}")
+    return build_sheet_index(sheet_name)
+
+def get_source_rev(sheet_name: str) -> 'str | None':
+    # Dropbox revision of the CSV the index was built from, if the index is still current
+    manifest = read_manifest()
+    if is_index_current(sheet_name, manifest):
+        return manifest[sheet_name].get('rev')
+
+    return None
+
+def record_source_rev(sheet_name: str, rev: str) -> None:
+    manifest = read_manifest()
+    if is_index_current(sheet_name, manifest):
+        manifest[sheet_name]['rev'] = rev
+        write_manifest(manifest)
+
+def download_sheet(dbx, sheet_name: str) -> None:
+
+    dropbox_path = f"/List Cleaner & JC DNC/{sheet_name}.csv"
+    local_file_path = os.path.join(DATA_PATH, f"{sheet_name}.csv")
+
+    # Keep the local copy and its index if both exist and the Dropbox file has not changed
+    if sheet_name in INDEXED_SHEETS and os.path.exists(local_file_path) \
+            and os.path.exists(os.path.join(INDEX_PATH, f"{sheet_name}.npy")):
+        metadata = dbx.files_get_metadata(dropbox_path)
+        if get_source_rev(sheet_name) == metadata.rev:
+            return
+
+    metadata, response = dbx.files_download(dropbox_path)
+
+    with open(local_file_path, 'wb') as f:
+        f.write(response.content)
+
+    # Indexed right away so the next run can skip the download by revision
+    if sheet_name in INDEXED_SHEETS:
+        build_sheet_index(sheet_name)
+        record_source_rev(sheet_name, metadata.rev)
+
+def isin_index(values: 'pd.DataFrame | pd.Series', indexes: list) -> np.ndarray:
+    # Vectorized membership of phone or ID columns against one or more sorted indexes
+    if isinstance(values, pd.DataFrame):
+        numeric = values.apply(pd.to_numeric, errors='coerce')
+    else:
+        numeric = pd.to_numeric(values, errors='coerce')
+
+    numbers = numeric.to_numpy(dtype='float64', na_value=np.nan)
+    valid = (numbers > 0) & (numbers == np.floor(numbers))
+    numbers = np.where(valid, numbers, 0).astype('int64')
+
+    found = np.zeros(numbers.shape, dtype=bool)
+    for index in indexes:
+        if len(index) == 0:
+            continue
+        positions = np.minimum(np.searchsorted(index, numbers), len(index) - 1)
+        found |= index[positions] == numbers
+
+    return found & valid
@@ -0,0 +1,116 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from .c3_automation import add_pipedrive_columns
+
+# Run with: python -m tools.c3_automation_tool.benchmark [opt-outs] [pipedrive rows]
+
+def legacy_add_pipedrive_columns(input_df: pd.DataFrame, pipedrive_exploded_df: pd.DataFrame):
+
+    # Lambda per group aggregation that add_pipedrive_columns replaced, kept as the reference result
+    pipedrive_columns = [
+        'Deal - ID',
+        'Activity - Subject',
+        'Activity - Add time',
+        'Activity - Deal',
+        'Activity - Contact person',
+        'Deal - Deal Status',
+        'Deal - Unique Database ID',
+        'Deal - Marketing Medium',
+        'Person - Mailing Address',
+        'deleted_at'
+    ]
+    agg_columns = ['Contact ID', 'Deal ID', 'Activity', 'PD Removal Activity Date', 'Contact Person', 'Deal Status', 'Marketing Medium', 'Notes']
+    output_columns = [
+        'Contact ID', 'Deal ID', 'Contact Person', 'PD Removal Activity Date', 'Source of Opt-out Request', 'Opt-out Medium',
+        'Contact Information', 'Opt-out Entry Date', 'Contact Info Removal from Database Date', 'Source', 'Marketing Medium',
+        'Deal Status', 'Activity', 'Category', 'Notes'
+    ]
+    groupby_column = 'row_number'
+
+    merged_df = input_df.merge(pipedrive_exploded_df, left_on='Contact ID', right_on='Deal - Unique Database ID', how='left')
+    merged_df['Contact Info Removal from Database Date'] = merged_df['deleted_at']
+    merged_df['Deal ID'] = merged_df['Deal - ID']
+    merged_df['Contact Person'] = merged_df['Activity - Contact person']
+    merged_df['PD Removal Activity Date'] = merged_df['Activity - Add time']
+    merged_df['Deal Status'] = merged_df['Deal - Deal Status']
+    merged_df['Activity'] = merged_df['Activity - Subject']
+    merged_df['Marketing Medium'] = merged_df['Deal - Marketing Medium']
+    merged_df.drop(columns=pipedrive_columns, axis=1, inplace=True)
+
+    columns_to_retain = [col for col in merged_df.columns if col not in agg_columns and col != groupby_column]
+    aggregated_df = merged_df[merged_df['Deal ID'].notna()].groupby(groupby_column).agg(
+        {col: lambda x: ' | '.join(map(str, sorted(set(x[pd.notna(x)])))) if x[pd.notna(x)].any() else np.nan for col in agg_columns}
+    ).reset_index()
+
+    contact_id_col = merged_df.groupby(groupby_column, sort=False, observed=True)['Contact ID'] \
+        .agg(lambda x: ' | '.join(map(str, sorted(set(x.dropna())))) if x.notna().any() else pd.NA) \
+        .reset_index()
+
+    retained_df = merged_df[columns_to_retain + [groupby_column]].drop_duplicates(groupby_column)
+    with_pipedrive_df = retained_df.merge(aggregated_df, on=groupby_column, how='left').drop(columns=['Contact ID'], axis=1)
+    final_df = with_pipedrive_df.merge(contact_id_col, on=groupby_column, how='left')[output_columns]
+    final_df.drop_duplicates(inplace=True)
+    return final_df
+
+def make_synthetic_pipedrive(row_count: int, seed: int = 0) -> pd.DataFrame:
+
+    # One row per contact like extract_pipedrive_data, about a third of the contacts share a deal
+    rng = np.random.default_rng(seed)
+    deal_ids = rng.integers(1, max(row_count * 2 // 3, 2), size=row_count)
+    return pd.DataFrame({
+        'Deal - ID': pd.array(deal_ids, dtype='Int64'),
+        'Activity - Subject': rng.choice(['Opt-out request', 'Removed from list', None], size=row_count),
+        'Activity - Add time': rng.choice(['2024-01-05 10:00:00', '2024-02-11 09:30:00', '2024-03-02 15:45:00'], size=row_count),
+        'Activity - Deal': deal_ids.astype(str),
+        'Activity - Contact person': rng.choice(['JOHN DOE', 'JANE DOE', 'MARY SMITH', None], size=row_count),
+        'Deal - Deal Status': rng.choice(['Open', 'Lost', 'Won'], size=row_count),
+        'Deal - Unique Database ID': pd.array(np.arange(1, row_count + 1), dtype='Int64'),
+        'Deal - Marketing Medium': rng.choice(['Direct Mail', 'Phone', 'Email'], size=row_count),
+        'Person - Mailing Address': '1 MAIN ST AUSTIN TX'
+    })
+
+def make_synthetic_opt_outs(row_count: int, contact_count: int, seed: int = 1) -> pd.DataFrame:
+
+    # Phone and email merges repeat an opt-out once per matched contact, a tenth match nothing
+    rng = np.random.default_rng(seed)
+    row_numbers = np.repeat(np.arange(row_count), rng.choice([1, 1, 1, 2, 3], size=row_count))
+    contact_ids = rng.integers(1, contact_count * 2, size=len(row_numbers)).astype('float64')
+    contact_ids[rng.random(len(row_numbers)) < 0.1] = np.nan
+    return pd.DataFrame({
+        'Source of Opt-out Request': rng.choice(['Website', 'Phone Call', 'Letter'], size=row_count)[row_numbers],
+        'Opt-out Medium': rng.choice(['Direct Mail', 'Phone', 'Email'], size=row_count)[row_numbers],
+        'Contact Information': rng.integers(2_000_000_000, 9_999_999_999, size=row_count).astype(str)[row_numbers],
+        'Opt-out Entry Date': '2024-03-15',
+        'Source': 'C3',
+        'Category': rng.choice(['Opt-out', 'DNC'], size=row_count)[row_numbers],
+        'Notes': rng.choice(['Contact Exact Address Match', 'Contact Close Address Match, Matched MO Name', None], size=len(row_numbers)),
+        'Contact ID': pd.array(contact_ids, dtype='Int64'),
+        'deleted_at': rng.choice([None, '2024-03-20 08:00:00'], size=len(row_numbers)),
+        'row_number': row_numbers
+    })
+
+def time_add_pipedrive_columns(add_columns, input_df: pd.DataFrame, pipedrive_df: pd.DataFrame) -> 'tuple[pd.DataFrame, float]':
+    start = time.perf_counter()
+    final_df = add_columns(input_df.copy(), pipedrive_df)
+    return final_df, time.perf_counter() - start
+
+def main(row_count: int = 100_000, pipedrive_count: int = 1_000_000) -> None:
+
+    pipedrive_df = make_synthetic_pipedrive(pipedrive_count)
+    input_df = make_synthetic_opt_outs(row_count, pipedrive_count)
+    print(f"Synthetic opt-outs: {row_count:,} ({len(input_df):,} matched rows), exploded Pipedrive: {pipedrive_count:,} rows")
+
+    legacy_df, legacy_seconds = time_add_pipedrive_columns(legacy_add_pipedrive_columns, input_df, pipedrive_df)
+    print(f"Lambda per group: {legacy_seconds:.2f}s")
+
+    final_df, seconds = time_add_pipedrive_columns(add_pipedrive_columns, input_df, pipedrive_df)
+    print(f"Vectorized:       {seconds:.2f}s")
+
+    # The reference stops before the export rename, columns are compared in order
+    pd.testing.assert_frame_equal(final_df, legacy_df.set_axis(final_df.columns, axis=1), check_dtype=False)
+    print(f"Results identical, {legacy_seconds / seconds:.1f}x faster")
+
+if __name__ == "__main__":
+    main(*[int(count) for count in sys.argv[1:3]])
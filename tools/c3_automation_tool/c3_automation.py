@@ -2,9 +2,11 @@ import os
 import pandas as pd
 import numpy as np
 import warnings
+from datetime import datetime
 from rapidfuzz import process, fuzz
-from sqlalchemy import create_engine
-from urllib.parse import quote
+from tools.shared.database import read_sql_queries
+from tools.shared.mirror import use_mirror, read_mirror_queries
+from .c3_cache import CACHE_INTERVAL, CACHE_OVERLAP, load_c3_snapshot, save_c3_snapshot, touch_c3_snapshot, drop_unchanged_rows, upsert_rows
 
 warnings.simplefilter(action='ignore', category=FutureWarning)
 pd.options.mode.chained_assignment = None
@@ -17,131 +19,149 @@ def read_file(path: str):
     else:
         raise RuntimeError("Incorrect file format")
 
+# Normalized column in each snapshot, the rest of the row is carried as read
+SNAPSHOT_COLUMNS = {
+    'skip_traced': 'skip_traced_address',
+    'source_address': 'source_address',
+    'email_address': 'email_address',
+    'phone_number': 'phone_number',
+    'contacts': 'full_name'
+}
+
+# Each snapshot binds its own high-water mark, one stale table never widens the others' reads
+SINCE_FILTER = 'WHERE updated_at >= :{name}_since OR deleted_at >= :{name}_since'
+
+def clean_text(values: pd.Series) -> pd.Series:
+    values = values.str.upper().str.strip().str.replace(',', '')
+    return values.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+def refresh_c3_snapshots(queries: dict) -> 'dict[str, pd.DataFrame]':
+
+    # Missing or expired snapshots are read in full, the rest only fetch rows changed since their high-water mark
+    snapshots = {name: load_c3_snapshot(name, query) for name, query in queries.items()}
+    full_queries = {name: query.format(since_filter='') for name, query in queries.items() if snapshots[name] is None}
+    incremental_queries = {
+        name: query.format(since_filter=SINCE_FILTER.format(name=name)) for name, query in queries.items()
+        if snapshots[name] is not None and datetime.now() - snapshots[name]['built_at'] >= CACHE_INTERVAL
+    }
+
+    # CONCAT_WS is registered on the mirror, so the same queries run on either source
+    read_queries = read_mirror_queries if use_mirror() else read_sql_queries
+    changes = {}
+    if full_queries:
+        print(f"Fetching full snapshots: {', '.join(full_queries)}")
+        changes.update(read_queries(full_queries))
+    if incremental_queries:
+        params = {
+            f"{name}_since": (snapshots[name]['high_water_mark'] - CACHE_OVERLAP).strftime('%Y-%m-%d %H:%M:%S')
+            for name in incremental_queries
+        }
+        changes.update(read_queries(incremental_queries, params))
+
+    # Only fetched rows are normalized, cached rows were normalized when they were first read
+    for name, changed_df in changes.items():
+        changed_df[SNAPSHOT_COLUMNS[name]] = clean_text(changed_df[SNAPSHOT_COLUMNS[name]])
+        snapshot = snapshots[name]
+        if snapshot is None:
+            changed_df = changed_df.sort_values('id', kind='stable', ignore_index=True)
+            save_c3_snapshot(name, queries[name], changed_df)
+            snapshots[name] = {'df': changed_df}
+        elif drop_unchanged_rows(snapshot['df'], changed_df).empty:
+            touch_c3_snapshot(name)
+        else:
+            snapshot['df'] = upsert_rows(snapshot['df'], changed_df)
+            save_c3_snapshot(name, queries[name], snapshot['df'], snapshot['refreshed_at'])
+
+    return {name: snapshot['df'] for name, snapshot in snapshots.items()}
+
 def compile_c3_contacts():
     print("Compiling database files")
-    # c3_data_path = './data/c3_files'
-
-    # # Compile contact addresses
-    # for subdir, _, files in os.walk(os.path.join(c3_data_path, 'contact_addresses')):
-    #     source_address_df = pd.concat([pd.read_csv(os.path.join(subdir, file), low_memory=False) for file in files], ignore_index=True)
-
-    # # Compile email addresses
-    # for subdir, _, files in os.walk(os.path.join(c3_data_path, 'contact_email_addresses')):
-    #     email_address_df = pd.concat([pd.read_csv(os.path.join(subdir, file), low_memory=False) for file in files], ignore_index=True)
-
-    # # Compile phone numbers
-    # for subdir, _, files in os.walk(os.path.join(c3_data_path, 'contact_phone_numbers')):
-    #     phone_number_df = pd.concat([pd.read_csv(os.path.join(subdir, file), low_memory=False) for file in files], ignore_index=True)
-
-    # # Compile skip traced addresses
-    # for subdir, _, files in os.walk(os.path.join(c3_data_path, 'contact_skip_traced_addresses')):
-    #     skip_traced_df = pd.concat([pd.read_csv(os.path.join(subdir, file), low_memory=False) for file in files], ignore_index=True)
-
-    # # Compile skip traced addresses
-    # for subdir, _, files in os.walk(os.path.join(c3_data_path, 'contacts')):
-    #     contacts_df = pd.concat([pd.read_csv(os.path.join(subdir, file), low_memory=False) for file in files], ignore_index=True)
-    # skip_traced_df['skip_traced_address'] = skip_traced_df[['address', 'city', 'state']].fillna('').agg(' '.join, axis=1)
-
-    CM_HOST = os.getenv('DB_HOST')
-    CM_USER = os.getenv('DB_USER')
-    CM_PASSWORD = os.getenv('DB_PASSWORD')
-    CM_DB = os.getenv('DB_NAME')
 
     skip_traced_query = """
     SELECT
+        id,
         contact_id,
         CONCAT_WS(' ', address, city, state) AS skip_traced_address,
+        updated_at,
         deleted_at
     FROM
-        contact_skip_traced_addresses;
+        contact_skip_traced_addresses
+    {since_filter};
     """
 
     source_address_query = """
     SELECT
+        id,
         contact_id,
         CONCAT_WS(' ', source_address, source_city, source_state) AS source_address,
+        updated_at,
         deleted_at
     FROM
-        contact_addresses;
+        contact_addresses
+    {since_filter};
     """
 
     email_query = """
     SELECT
+        id,
         contact_id,
         email_address,
+        updated_at,
         deleted_at
     FROM
-        contact_email_addresses;
+        contact_email_addresses
+    {since_filter};
     """
 
     phone_query = """
     SELECT
+        id,
         contact_id,
         phone_number,
+        updated_at,
         deleted_at
     FROM
-        contact_phone_numbers;
+        contact_phone_numbers
+    {since_filter};
     """
 
     contact_query = """
     SELECT
+        id,
         id AS contact_id,
         UPPER(CONCAT_WS(' ', first_name, middle_name, last_name)) AS full_name,
+        updated_at,
         deleted_at
     FROM
-        contacts;
+        contacts
+    {since_filter};
     """
 
-    engine = create_engine(f"mysql+pymysql://{CM_USER}:{quote(CM_PASSWORD)}@{CM_HOST}/{CM_DB}")
-    skip_traced_df = pd.read_sql_query(skip_traced_query, con=engine)
-    source_address_df = pd.read_sql_query(source_address_query, con=engine)
-    email_address_df = pd.read_sql_query(email_query, con=engine)
-    phone_number_df = pd.read_sql_query(phone_query, con=engine)
-    contacts_df = pd.read_sql_query(contact_query, con=engine)
-
-    # Skip traced cleanups
-    skip_traced_df.dropna(subset=['skip_traced_address'], inplace=True)
-    skip_traced_df['skip_traced_address'] = skip_traced_df['skip_traced_address'].str.upper().str.strip()
-    skip_traced_df['skip_traced_address'] = skip_traced_df['skip_traced_address'].str.replace(',', '')
-    skip_traced_df['skip_traced_address'] = skip_traced_df['skip_traced_address'].str.replace(r'\s+', ' ', regex=True).str.strip()
-    skip_traced_df = skip_traced_df[['contact_id', 'skip_traced_address', 'deleted_at']]
-
-    # Source address cleanups
-    # source_address_df['source_address'] = source_address_df[['source_address', 'source_city', 'source_state']].fillna('').agg(' '.join, axis=1)
-    source_address_df.dropna(subset=['source_address'], inplace=True)
-    source_address_df['source_address'] = source_address_df['source_address'].str.upper().str.strip()
-    source_address_df['source_address'] = source_address_df['source_address'].str.replace(',', '')
-    source_address_df['source_address'] = source_address_df['source_address'].str.replace(r'\s+', ' ', regex=True).str.strip()
-    source_address_df = source_address_df[['contact_id', 'source_address', 'deleted_at']]
-
-    # Emaill address cleanups
-    email_address_df.dropna(subset=['email_address'], inplace=True)
-    email_address_df['email_address'] = email_address_df['email_address'].str.upper().str.strip()
-    email_address_df['email_address'] = email_address_df['email_address'].str.replace(',', '')
-    email_address_df['email_address'] = email_address_df['email_address'].str.replace(r'\s+', ' ', regex=True).str.strip()
-    email_address_df.rename(columns={'email_deleted_at': 'deleted_at'}, inplace=True)
-
-    # Phone number cleanups
-    phone_number_df.dropna(subset=['phone_number'], inplace=True)
-    phone_number_df.drop_duplicates(subset=['contact_id', 'phone_number'], inplace=True)
-    phone_number_df['phone_number'] = phone_number_df['phone_number'].str.upper().str.strip()
-    phone_number_df['phone_number'] = phone_number_df['phone_number'].str.replace(',', '')
-    phone_number_df['phone_number'] = phone_number_df['phone_number'].str.replace(r'\s+', ' ', regex=True).str.strip()
-    phone_number_df.rename(columns={'phone_deleted_at': 'deleted_at'}, inplace=True)
-
-    # Contact names cleanup
-    contacts_df.dropna(subset=['full_name'], inplace=True)
-    contacts_df['full_name'] = contacts_df['full_name'].str.upper().str.strip()
-    contacts_df['full_name'] = contacts_df['full_name'].str.replace(',', '')
-    contacts_df['full_name'] = contacts_df['full_name'].str.replace(r'\s+', ' ', regex=True).str.strip()
-
-    skip_traced_df.to_csv('./data/c3_files/contact_skip_traced_addresses/skip_traced.csv', index=False)
-    source_address_df.to_csv('./data/c3_files/contact_addresses/source_addresses.csv', index=False)
-    email_address_df.to_csv('./data/c3_files/contact_email_addresses/emails.csv', index=False)
-    phone_number_df.to_csv('./data/c3_files/contact_phone_numbers/phones.csv', index=False)
-    contacts_df.to_csv('./data/c3_files/contacts/contact_names.csv', index=False)
-
-    return skip_traced_df, source_address_df, email_address_df, phone_number_df, contacts_df
+    snapshots = refresh_c3_snapshots({
+        'skip_traced': skip_traced_query,
+        'source_address': source_address_query,
+        'email_address': email_query,
+        'phone_number': phone_query,
+        'contacts': contact_query
+    })
+
+    # Rows without a value are kept in the snapshots so a later update can fill them in
+    compiled = {}
+    for name, column in SNAPSHOT_COLUMNS.items():
+        compiled[name] = snapshots[name].dropna(subset=[column])[['contact_id', column, 'deleted_at']].reset_index(drop=True)
+
+    phone_number_df = compiled['phone_number'].drop_duplicates(subset=['contact_id', 'phone_number'])
+
+    # Built once per run and shared by every input file
+    address_indexes = {
+        'skip_traced': build_address_index(compiled['skip_traced'], 'skip_traced_address'),
+        'source_address': build_address_index(compiled['source_address'], 'source_address')
+    }
+    address_blocks = {
+        'skip_traced': build_address_blocks(compiled['skip_traced']['skip_traced_address']),
+        'source_address': build_address_blocks(compiled['source_address']['source_address'])
+    }
+    return compiled['skip_traced'], compiled['source_address'], compiled['email_address'], phone_number_df, compiled['contacts'], address_indexes, address_blocks
 
 def find_phone_number_match(input_df: pd.DataFrame, phone_number_df: pd.DataFrame, contacts_df: pd.DataFrame):
     print("Processing phone numbers")
@@ -201,60 +221,128 @@ def mailing_address_note(row: pd.Series):
     else:
         return 'No Address Match Found'
 
-def find_skip_trace_match(input_df: pd.DataFrame, skip_traced_df: pd.DataFrame):
+# Smaller score matrices are cheaper on one thread than starting a worker per core
+PARALLEL_MATCH_CELLS = 100_000
+
+def get_match_memory_mb() -> int:
+    # Largest score matrix one cdist call may allocate
+    return int(os.getenv('C3_MATCH_MEMORY_MB', 256))
+
+def extract_best_matches(queries: np.ndarray, choices: np.ndarray, score_cutoff: float = 90) -> 'tuple[np.ndarray, np.ndarray]':
+
+    # Best choice and score per query, scored a slice of rows at a time on every core so the matrix stays under budget
+    best_columns = np.zeros(len(queries), dtype='int64')
+    best_scores = np.zeros(len(queries), dtype='float32')
+    if len(queries) == 0 or len(choices) == 0:
+        return best_columns, best_scores
+
+    chunk_rows = max(1, get_match_memory_mb() * 1024 * 1024 // (len(choices) * best_scores.itemsize))
+    workers = -1 if min(chunk_rows, len(queries)) * len(choices) >= PARALLEL_MATCH_CELLS else 1
+    for start in range(0, len(queries), chunk_rows):
+        scores = process.cdist(queries[start:start + chunk_rows], choices, scorer=fuzz.ratio,
+                               score_cutoff=score_cutoff, dtype=np.float32, workers=workers)
+        columns = scores.argmax(axis=1)
+        best_columns[start:start + len(columns)] = columns
+        best_scores[start:start + len(columns)] = scores[np.arange(len(columns)), columns]
+
+    return best_columns, best_scores
+
+def get_block_keys(addresses: pd.Series) -> 'list[pd.Series]':
+
+    # Any two of state, house number and first street word, so a typo in one of them still shares a block
+    state = addresses.str.extract(r'(\S+)$')[0]
+    number = addresses.str.extract(r'(\d+)')[0]
+    street = addresses.str.extract(r'(?:^|\s)([A-Za-z]+)\s')[0]
+    return [state + ' ' + number, state + ' ' + street, number + ' ' + street]
+
+def build_address_blocks(addresses: pd.Series) -> 'list[dict[str, np.ndarray]]':
+    # Database positions per block key, one lookup per key type
+    return [keys.groupby(keys.to_numpy()).indices for keys in get_block_keys(addresses)]
+
+def find_best_address_matches(input_addresses: pd.Series, addresses: pd.Series, address_blocks: 'list[dict[str, np.ndarray]]') -> 'tuple[np.ndarray, np.ndarray]':
+
+    # Each input is only scored against database addresses sharing one of its blocks,
+    # the best over every block is the best over their union, ties go to the earliest address like np.argmax
+    best_positions = np.full(len(input_addresses), -1)
+    best_scores = np.zeros(len(input_addresses), dtype='float32')
+    if len(input_addresses) == 0:
+        return best_positions, best_scores
+
+    input_values = input_addresses.to_numpy()
+    address_values = addresses.to_numpy()
+
+    for input_keys, key_blocks in zip(get_block_keys(input_addresses), address_blocks):
+        for key, input_positions in input_keys.groupby(input_keys.to_numpy()).indices.items():
+            candidate_positions = key_blocks.get(key)
+            if candidate_positions is None:
+                continue
+
+            best_columns, block_scores = extract_best_matches(input_values[input_positions], address_values[candidate_positions])
+            block_positions = candidate_positions[best_columns]
+
+            current_scores = best_scores[input_positions]
+            better = (block_scores > current_scores) | \
+                ((block_scores == current_scores) & (block_scores > 0) & (block_positions < best_positions[input_positions]))
+            best_scores[input_positions[better]] = block_scores[better]
+            best_positions[input_positions[better]] = block_positions[better]
+
+    best_positions[best_scores < 90.0] = -1
+    return best_positions, best_scores
+
+def build_address_index(address_df: pd.DataFrame, address_column: str) -> pd.Series:
+    # Contact ID keyed by normalized address, the first row wins like the first best score in the fuzzy matcher
+    unique_df = address_df.drop_duplicates(subset=[address_column])
+    return pd.Series(unique_df['contact_id'].to_numpy(), index=pd.Index(unique_df[address_column].to_numpy(), dtype=object))
+
+def map_address_matches(input_addresses: pd.Series, address_df: pd.DataFrame, address_column: str, address_index: pd.Series, address_blocks: 'list[dict[str, np.ndarray]]') -> 'tuple[pd.Series, pd.Series, pd.Series]':
+
+    # Exact addresses resolve through the hash index, only the rest go to fuzzy matching
+    unique_addresses = pd.Series(input_addresses.dropna().unique(), dtype=object)
+    exact_positions = address_index.index.get_indexer(unique_addresses)
+    exact = exact_positions >= 0
+    fuzzy_addresses = unique_addresses[~exact].reset_index(drop=True)
+    best_positions, best_scores = find_best_address_matches(fuzzy_addresses, address_df[address_column], address_blocks)
+    matched = best_positions >= 0
+
+    # Best matching address, its contact and score keyed by input address
+    exact_addresses = unique_addresses[exact].to_numpy()
+    matched_addresses = np.concatenate([exact_addresses, fuzzy_addresses[matched].to_numpy()])
+    best_address_match = pd.Series(
+        np.concatenate([exact_addresses, address_df[address_column].to_numpy()[best_positions[matched]]]),
+        index=matched_addresses
+    )
+    best_match = pd.Series(
+        np.concatenate([address_index.to_numpy()[exact_positions[exact]], address_df['contact_id'].to_numpy()[best_positions[matched]]]),
+        index=matched_addresses
+    )
+    best_score = pd.Series(
+        np.concatenate([np.full(exact.sum(), 100.0, dtype='float32'), best_scores[matched]]),
+        index=matched_addresses
+    )
+    return best_address_match, best_match, best_score
+
+def find_skip_trace_match(input_df: pd.DataFrame, skip_traced_df: pd.DataFrame, skip_traced_index: pd.Series, skip_traced_blocks: 'list[dict[str, np.ndarray]]'):
     print("Processing direct mails")
-    # Convert addresses to lists for efficient lookup
     direct_mail_df = input_df[input_df["Opt-out Medium"] == "Direct Mail"]
-    input_addresses = direct_mail_df['address_info'].tolist()
-    skip_addresses = skip_traced_df['skip_traced_address'].tolist()
-
-    # Efficient bulk fuzzy matching
-    matches = process.cdist(input_addresses, skip_addresses, scorer=fuzz.ratio, score_cutoff=90)
-    best_match_dict = {}
-    best_score_dict = {}
-    best_address_match_dict = {}
-
-    for input_idx, match_list in enumerate(matches):
-        best_match_idx = np.argmax(match_list)
-        best_score = match_list[best_match_idx]
-        if best_score >= 90.0:
-            best_address_match_dict[input_addresses[input_idx]] = skip_traced_df.iloc[best_match_idx]['skip_traced_address']
-            best_match_dict[input_addresses[input_idx]] = skip_traced_df.iloc[best_match_idx]['contact_id']
-            best_score_dict[input_addresses[input_idx]] = best_score
+    best_address_match, best_match, best_score = map_address_matches(direct_mail_df['address_info'], skip_traced_df, 'skip_traced_address', skip_traced_index, skip_traced_blocks)
 
     # Map matched contact_ids to input_df
-    input_df['Skip Traced Address'] = input_df['address_info'].map(best_address_match_dict)
-    input_df['Contact ID'] = input_df['address_info'].map(best_match_dict)
-    input_df['Best Score'] = input_df['address_info'].map(best_score_dict)
+    input_df['Skip Traced Address'] = input_df['address_info'].map(best_address_match)
+    input_df['Contact ID'] = input_df['address_info'].map(best_match)
+    input_df['Best Score'] = input_df['address_info'].map(best_score)
     
     return input_df
 
-def find_source_address_match(input_df: pd.DataFrame, source_address_df: pd.DataFrame):
-    # Convert addresses to lists for efficient lookup
-    input_addresses = input_df['address_info'].tolist()
-    skip_addresses = source_address_df['source_address'].tolist()
-
-    # Efficient bulk fuzzy matching
-    matches = process.cdist(input_addresses, skip_addresses, scorer=fuzz.ratio, score_cutoff=90)
-    best_match_dict = {}
-    best_score_dict = {}
-    best_address_match_dict = {}
-
-    for input_idx, match_list in enumerate(matches):
-        best_match_idx = np.argmax(match_list)
-        best_score = match_list[best_match_idx]
-        if best_score >= 90.0:
-            best_address_match_dict[input_addresses[input_idx]] = source_address_df.iloc[best_match_idx]['source_address']
-            best_match_dict[input_addresses[input_idx]] = source_address_df.iloc[best_match_idx]['contact_id']
-            best_score_dict[input_addresses[input_idx]] = best_score
+def find_source_address_match(input_df: pd.DataFrame, source_address_df: pd.DataFrame, source_address_index: pd.Series, source_address_blocks: 'list[dict[str, np.ndarray]]'):
 
     # Apply mappings only where 'Contact ID' is NaN
     mask = input_df['Contact ID'].isna()
+    best_address_match, best_match, best_score = map_address_matches(input_df.loc[mask, 'address_info'], source_address_df, 'source_address', source_address_index, source_address_blocks)
 
     # Map matched contact_ids to input_df
-    input_df.loc[mask, 'Skip Traced Address'] = input_df.loc[mask, 'address_info'].map(best_address_match_dict)
-    input_df.loc[mask, 'Contact ID'] = input_df.loc[mask, 'address_info'].map(best_match_dict)
-    input_df.loc[mask, 'Best Score'] = input_df.loc[mask, 'address_info'].map(best_score_dict)
+    input_df.loc[mask, 'Skip Traced Address'] = input_df.loc[mask, 'address_info'].map(best_address_match)
+    input_df.loc[mask, 'Contact ID'] = input_df.loc[mask, 'address_info'].map(best_match)
+    input_df.loc[mask, 'Best Score'] = input_df.loc[mask, 'address_info'].map(best_score)
     input_df['Contact ID'] = input_df['Contact ID'].astype('Int64')
     input_df['Notes'] = input_df.apply(mailing_address_note, axis=1)
 
@@ -309,6 +397,26 @@ def filter_input_file(input_df: pd.DataFrame):
     
     return direct_mail_df, email_df, phone_df
 
+def join_distinct_values(df: pd.DataFrame, groupby_column: str, column: str) -> pd.Series:
+
+    # Sorted distinct non-null values per group joined with " | ", groups whose values are all falsy are left out
+    values = df[[groupby_column, column]].dropna(subset=[column]).drop_duplicates()
+    values = values.sort_values([groupby_column, column], kind='stable')
+    codes, uniques = pd.factorize(values[column])
+
+    # Each distinct value is stringified once, rows only carry its code
+    strings = np.array([str(value) for value in uniques], dtype=object)[codes]
+    truthy = np.array([bool(value) for value in uniques], dtype=bool)[codes]
+    groups, starts, counts = np.unique(values[groupby_column].to_numpy(), return_index=True, return_counts=True)
+
+    # Most groups hold one value, only the rest need a join
+    joined = strings[starts]
+    for i in np.flatnonzero(counts > 1):
+        joined[i] = " | ".join(strings[starts[i]:starts[i] + counts[i]])
+
+    has_truthy = np.logical_or.reduceat(truthy, starts) if len(starts) else np.zeros(0, dtype=bool)
+    return pd.Series(joined[has_truthy], index=groups[has_truthy], dtype=object)
+
 def add_pipedrive_columns(input_df: pd.DataFrame, pipedrive_exploded_df: pd.DataFrame):
     pipedrive_columns = [
         'Deal - ID',
@@ -367,17 +475,18 @@ def add_pipedrive_columns(input_df: pd.DataFrame, pipedrive_exploded_df: pd.Data
     merged_df.drop(columns=pipedrive_columns, axis=1, inplace=True)
 
     columns_to_retain = [col for col in merged_df.columns if col not in agg_columns and col != groupby_column]
-    aggregated_df = merged_df[merged_df['Deal ID'].notna()].groupby(groupby_column).agg(
-        {col: lambda x: ' | '.join(map(str, sorted(set(x[pd.notna(x)])))) if x[pd.notna(x)].any() else np.nan for col in agg_columns}
-    ).reset_index()
+    retained_df = merged_df[columns_to_retain + [groupby_column]].drop_duplicates(groupby_column)
 
-    contact_id_col = merged_df.groupby(groupby_column, sort=False, observed=True)['Contact ID'] \
-        .agg(lambda x: ' | '.join(map(str, sorted(set(x.dropna())))) if x.notna().any() else pd.NA) \
-        .reset_index()
+    # Pipedrive details only come from rows with a deal, contact IDs from every row
+    deal_df = merged_df[merged_df['Deal ID'].notna()]
+    for col in agg_columns:
+        if col == 'Contact ID':
+            contact_ids = join_distinct_values(merged_df, groupby_column, col)
+            retained_df[col] = contact_ids.reindex(retained_df[groupby_column], fill_value=pd.NA).to_numpy()
+        else:
+            retained_df[col] = retained_df[groupby_column].map(join_distinct_values(deal_df, groupby_column, col))
 
-    retained_df = merged_df[columns_to_retain + [groupby_column]].drop_duplicates(groupby_column)
-    with_pipedrive_df = retained_df.merge(aggregated_df, on=groupby_column, how='left').drop(columns=['Contact ID'], axis=1)
-    final_df = with_pipedrive_df.merge(contact_id_col, on=groupby_column, how='left')[output_columns]
+    final_df = retained_df[output_columns].reset_index(drop=True)
     final_df.drop_duplicates(inplace=True)
     final_df.rename(columns={
         'Contact ID': 'UNIQUE_DB_ID',
@@ -439,7 +548,7 @@ def main(pipedrive_path: str, file_paths: tuple, save_path: str):
 
     try:
         pipedrive_exploded_df = extract_pipedrive_data(pipedrive_path)
-        skip_traced_df, source_address_df, email_address_df, phone_number_df, contacts_df = compile_c3_contacts()
+        skip_traced_df, source_address_df, email_address_df, phone_number_df, contacts_df, address_indexes, address_blocks = compile_c3_contacts()
         for file in file_paths:
             df_list = []
             input_df = read_file(file)
@@ -447,8 +556,8 @@ def main(pipedrive_path: str, file_paths: tuple, save_path: str):
 
             # Direct mail processing
             if not direct_mail_df.empty:
-                skip_traced_matched_df = find_skip_trace_match(direct_mail_df, skip_traced_df)
-                direct_mail_matched_df = find_source_address_match(skip_traced_matched_df, source_address_df)
+                skip_traced_matched_df = find_skip_trace_match(direct_mail_df, skip_traced_df, address_indexes['skip_traced'], address_blocks['skip_traced'])
+                direct_mail_matched_df = find_source_address_match(skip_traced_matched_df, source_address_df, address_indexes['source_address'], address_blocks['source_address'])
                 mo_names_df = check_address_to_name(direct_mail_matched_df, contacts_df)
                 mo_names_criteria_2_df = check_name_to_address(mo_names_df, skip_traced_df, source_address_df, contacts_df)
                 df_list.append(mo_names_criteria_2_df)
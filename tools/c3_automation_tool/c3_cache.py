@@ -0,0 +1,106 @@
+import os
+import json
+import hashlib
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+
+C3_CACHE_PATH = './data/c3_files'
+META_PATH = './data/c3_files/meta.json'
+
+# Full rebuild cadence, catches hard deletes and rows changed without touching updated_at
+FULL_REFRESH_DAYS = 7
+
+# Incremental reads start this far before the high-water mark to pick up late commits
+CACHE_OVERLAP = timedelta(hours=1)
+
+# Snapshots built within this window are used as is, without asking the database for changes
+CACHE_INTERVAL = timedelta(minutes=10)
+
+meta_lock = threading.Lock()
+
+def get_query_hash(query: str) -> str:
+    return hashlib.sha1(query.encode('utf-8')).hexdigest()
+
+def read_meta() -> dict:
+    if not os.path.exists(META_PATH):
+        return {}
+
+    with open(META_PATH, 'r') as f:
+        return json.load(f)
+
+def write_meta(meta: dict) -> None:
+    # Swapped in whole so a reader never sees a half written file, callers hold meta_lock
+    with open(f"{META_PATH}.tmp", 'w') as f:
+        json.dump(meta, f, indent=4)
+    os.replace(f"{META_PATH}.tmp", META_PATH)
+
+def get_high_water_mark(df: pd.DataFrame) -> 'pd.Timestamp | None':
+    # Latest updated_at or deleted_at in the snapshot, None when it has no timestamps yet
+    latest = pd.concat([pd.to_datetime(df['updated_at']), pd.to_datetime(df['deleted_at'])]).max()
+    return latest if pd.notna(latest) else None
+
+def load_c3_snapshot(name: str, query: str) -> 'dict | None':
+
+    with meta_lock:
+        entry = read_meta().get(name)
+    snapshot_file = os.path.join(C3_CACHE_PATH, f"{name}.pkl")
+    if not entry or not entry.get('high_water_mark') or not os.path.exists(snapshot_file):
+        return None
+
+    # A changed query or an old full refresh means the snapshot has to be rebuilt
+    if entry.get('query_hash') != get_query_hash(query):
+        return None
+    if datetime.now() - datetime.fromisoformat(entry['refreshed_at']) > timedelta(days=FULL_REFRESH_DAYS):
+        return None
+
+    return {
+        'df': pd.read_pickle(snapshot_file),
+        'high_water_mark': pd.Timestamp(entry['high_water_mark']),
+        'refreshed_at': entry['refreshed_at'],
+        'built_at': datetime.fromisoformat(entry['built_at'])
+    }
+
+def save_c3_snapshot(name: str, query: str, df: pd.DataFrame, refreshed_at: 'str | None' = None) -> None:
+
+    # Written next to the old file and swapped in, an interrupted run never leaves a half written snapshot
+    os.makedirs(C3_CACHE_PATH, exist_ok=True)
+    snapshot_file = os.path.join(C3_CACHE_PATH, f"{name}.pkl")
+    df.to_pickle(f"{snapshot_file}.tmp")
+    os.replace(f"{snapshot_file}.tmp", snapshot_file)
+
+    high_water_mark = get_high_water_mark(df)
+    with meta_lock:
+        meta = read_meta()
+        meta[name] = {
+            'query_hash': get_query_hash(query),
+            'high_water_mark': high_water_mark.isoformat() if high_water_mark is not None else None,
+            'refreshed_at': refreshed_at or datetime.now().isoformat(timespec='seconds'),
+            'built_at': datetime.now().isoformat(timespec='seconds'),
+            'rows': int(len(df))
+        }
+        write_meta(meta)
+
+def touch_c3_snapshot(name: str) -> None:
+
+    # Nothing changed since the last refresh, only the build time moves so the cache window starts again
+    with meta_lock:
+        meta = read_meta()
+        if name in meta:
+            meta[name]['built_at'] = datetime.now().isoformat(timespec='seconds')
+            write_meta(meta)
+
+def drop_unchanged_rows(cached_df: pd.DataFrame, changed_df: pd.DataFrame) -> pd.DataFrame:
+
+    # The overlap window fetches recent rows again, those with the same timestamps are already in the snapshot
+    def get_keys(df: pd.DataFrame) -> pd.MultiIndex:
+        return pd.MultiIndex.from_arrays([df['id'], pd.to_datetime(df['updated_at']), pd.to_datetime(df['deleted_at'])])
+
+    cached_df = cached_df[cached_df['id'].isin(changed_df['id'])]
+    return changed_df[~get_keys(changed_df).isin(get_keys(cached_df))]
+
+def upsert_rows(cached_df: pd.DataFrame, changed_df: pd.DataFrame) -> pd.DataFrame:
+    # Changed rows replace their cached copy by row ID, soft deletes stay so deleted_at still reaches the output,
+    # kept in ID order like a full read so first-row-wins matching does not depend on the cache's history
+    upserted_df = pd.concat([cached_df, changed_df], ignore_index=True).drop_duplicates('id', keep='last')
+    return upserted_df.sort_values('id', kind='stable', ignore_index=True)
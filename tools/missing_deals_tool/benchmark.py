@@ -0,0 +1,95 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from .lookup import format_phone, fill_text_lookup, fill_call_lookup
+
+# Run with: python -m tools.missing_deals_tool.benchmark [rows]
+
+def legacy_format_phone(lookup_df: pd.DataFrame) -> pd.DataFrame:
+
+    # Per-element lambdas that format_phone replaced, kept as the reference result
+    filtered_df = lookup_df[lookup_df['Deal ID'].isna()]
+    if 'From' in filtered_df.columns:
+        phone_column = 'From'
+        filtered_df['phone'] = filtered_df[phone_column]
+        filtered_df['phone'] = filtered_df['phone'].astype(str).apply(lambda x: x[1:] if len(x) == 11 else x)
+        filtered_df['phone'] = pd.to_numeric(filtered_df['phone'], errors='coerce').astype('Int64').astype(str)
+    else:
+        phone_column = 'ANI'
+        filtered_df['phone'] = filtered_df[phone_column]
+        filtered_df['phone'] = filtered_df['phone'].astype(str).apply(lambda x: x[1:] if len(x) == 13 else x)
+        filtered_df['phone'] = pd.to_numeric(filtered_df['phone'], errors='coerce').astype('Int64').astype(str)
+
+    return filtered_df, phone_column
+
+def legacy_fill_text_lookup(lookup_df: pd.DataFrame, phone_to_deal: dict) -> None:
+    lookup_df[['Deal ID', 'Resolved By']] = lookup_df.apply(
+        lambda row: (
+            phone_to_deal.get(row['phone'], row['Deal ID']) if pd.isna(row['Deal ID']) else row['Deal ID'],
+            'Joyce Marie Gempesaw' if pd.isna(row['Deal ID']) and row['phone'] in phone_to_deal else row['Resolved By']
+        ),
+        axis=1,
+        result_type='expand'
+    )
+
+def legacy_fill_call_lookup(lookup_df: pd.DataFrame, phone_to_deal: dict) -> None:
+    lookup_df[['Deal ID', 'Resolved by', 'Resolve Date']] = lookup_df.apply(
+        lambda row: (
+            phone_to_deal.get(row['phone'], row['Deal ID']) if pd.isna(row['Deal ID']) else row['Deal ID'],
+            'Joyce Marie Gempesaw' if pd.isna(row['Deal ID']) and row['phone'] in phone_to_deal else row['Resolved by'],
+            datetime.today().strftime('%m/%d/%Y') if pd.isna(row['Deal ID']) and row['phone'] in phone_to_deal else row['Resolve Date']
+        ),
+        axis=1,
+        result_type='expand'
+    )
+
+def make_synthetic_sheets(row_count: int, seed: int = 0) -> 'tuple[pd.DataFrame, pd.DataFrame, dict]':
+
+    # Phones drawn from a pool about half of which has Pipedrive deals
+    rng = np.random.default_rng(seed)
+    phone_pool = rng.integers(2_000_000_000, 9_999_999_999, size=max(row_count // 4, 10), dtype='int64')
+    deal_phones = phone_pool[:len(phone_pool) // 2]
+    phone_to_deal = {str(phone): str(deal_id) for deal_id, phone in enumerate(deal_phones, start=1)}
+
+    phones = rng.choice(phone_pool, size=row_count)
+    texts_df = pd.DataFrame({
+        'From': 10_000_000_000 + phones,
+        'Deal ID': np.nan,
+        'Resolved By': np.nan
+    })
+    calls_df = pd.DataFrame({
+        'ANI': [f"+1{phone}" if i % 3 else str(phone) for i, phone in enumerate(phones)],
+        'Resolved by': np.nan,
+        'Resolve Date': np.nan,
+        'Deal ID': np.nan
+    })
+    return texts_df, calls_df, phone_to_deal
+
+def time_lookup(format_func, fill_func, df: pd.DataFrame, phone_to_deal: dict) -> 'tuple[pd.DataFrame, float]':
+    start = time.perf_counter()
+    formatted_df, _ = format_func(df.copy())
+    fill_func(formatted_df, phone_to_deal)
+    return formatted_df, time.perf_counter() - start
+
+def main(row_count: int = 1_000_000) -> None:
+
+    texts_df, calls_df, phone_to_deal = make_synthetic_sheets(row_count)
+    print(f"Synthetic raw_texts and raw_calls: {row_count:,} rows each")
+
+    for name, df, legacy_fill, fill in [
+        ('raw_texts', texts_df, legacy_fill_text_lookup, fill_text_lookup),
+        ('raw_calls', calls_df, legacy_fill_call_lookup, fill_call_lookup)
+    ]:
+        legacy_df, legacy_seconds = time_lookup(legacy_format_phone, legacy_fill, df, phone_to_deal)
+        print(f"{name} row-wise apply: {legacy_seconds:.2f}s")
+
+        lookup_df, seconds = time_lookup(format_phone, fill, df, phone_to_deal)
+        print(f"{name} vectorized:     {seconds:.2f}s")
+
+        pd.testing.assert_frame_equal(lookup_df, legacy_df, check_dtype=False)
+        print(f"{name} results identical, {legacy_seconds / seconds:.1f}x faster")
+
+if __name__ == "__main__":
+    main(*[int(row_count) for row_count in sys.argv[1:2]])
@@ -1,26 +1,31 @@
+import numpy as np
 import pandas as pd
+from tools.shared.phone_deal_index import match_phone_deals
 
 def search_phone_number(df: pd.DataFrame,
-                        pipedrive_df: pd.DataFrame) -> 'tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]':
+                        pipedrive_df: pd.DataFrame,
+                        phone_deal_index: dict) -> 'tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]':
 
-    pipedrive_df['phone_number'] = pipedrive_df['phone_number'].fillna('')
-    pipedrive_df = pipedrive_df[pipedrive_df['phone_number'].str.strip() != '']
-    pipedrive_df['phone_number'] = pipedrive_df['phone_number'].str.split(',')
-    pipedrive_df['phone_number'] = pipedrive_df['phone_number'].apply(lambda x: sorted(set(x), key=x.index))
-    df_exploded = pipedrive_df.explode('phone_number').reset_index(drop=True)
+    # Phones are looked up in the shared phone-to-deal index, one row per matching deal
+    rows, deal_ids = match_phone_deals(phone_deal_index, df['From'])
+    fu_df = df.iloc[rows][['From', 'To', 'Text', 'Deal Created Date']].reset_index(drop=True)
+    fu_df['Deal - ID'] = deal_ids
 
-    merged_df = df.merge(df_exploded,
-                         left_on='From',
-                         right_on='phone_number',
-                         how='left')
-    fu_df = merged_df[merged_df['Deal - ID'].notna()][['From', 'To', 'Text', 'Deal Created Date', 'Deal - ID']]
-    no_deals_df = merged_df[merged_df['Deal - ID'].isna()].drop(columns=['phone_number'], axis=1)
+    # Unmatched rows keep the empty Pipedrive columns the old left merge gave them
+    matched = np.zeros(len(df), dtype=bool)
+    matched[rows] = True
+    no_deals_df = df[~matched].reset_index(drop=True)
+    for column in pipedrive_df.columns.drop('phone_number'):
+        if column not in no_deals_df.columns:
+            no_deals_df[column] = np.nan
 
-    return fu_df, no_deals_df, df_exploded
+    phone_deals_df = pipedrive_df[pipedrive_df['Deal - ID'].isin(phone_deal_index['deal_ids'])]
+
+    return fu_df, no_deals_df, phone_deals_df
 
 def get_cm_db_deals(no_deals_df: pd.DataFrame,
                     phone_number_df: pd.DataFrame,
-                    df_exploded: pd.DataFrame,
+                    phone_deals_df: pd.DataFrame,
                     cm_db_df: pd.DataFrame):
 
     phone_number_df['phone_number'] = phone_number_df['phone_number'].astype(str)
@@ -41,11 +46,11 @@ def get_cm_db_deals(no_deals_df: pd.DataFrame,
                                     how='left')
     deal_id_exist = get_deal_id_df[get_deal_id_df['deal_id'].notnull()]
     deal_id_exist['deal_id'] = deal_id_exist['deal_id'].astype('int64')
-    deal_id_exist_final = deal_id_exist[deal_id_exist['deal_id'].isin(df_exploded['Deal - ID'])]
+    deal_id_exist_final = deal_id_exist[deal_id_exist['deal_id'].isin(phone_deals_df['Deal - ID'])]
     no_deal_id = get_deal_id_df[get_deal_id_df['deal_id'].isna()].drop(columns='deal_id', axis=1)
     no_deal_id_final = no_deal_id[~no_deal_id['From'].isin(deal_id_exist_final['From'])]
 
-    merge_pd_deal_id_df = deal_id_exist_final.merge(df_exploded,
+    merge_pd_deal_id_df = deal_id_exist_final.merge(phone_deals_df,
                                                     left_on='deal_id',
                                                     right_on='Deal - ID',
                                                     how='left')
@@ -88,6 +93,7 @@ def export_fu(fu_df: pd.DataFrame,
 
 def process_fu(df: pd.DataFrame,
                pipedrive_df: pd.DataFrame,
+               phone_deal_index: dict,
                phone_number_df: pd.DataFrame,
                cm_db_df: pd.DataFrame,
                save_path: str,
@@ -98,10 +104,10 @@ def process_fu(df: pd.DataFrame,
     
     df['From'] = df['From'].astype(str).apply(lambda x: x[1:])
     df['To'] = df['To'].astype(str).apply(lambda x: x[1:])
-    fu_df, no_deals_df, df_exploded = search_phone_number(df, pipedrive_df)
+    fu_df, no_deals_df, phone_deals_df = search_phone_number(df, pipedrive_df, phone_deal_index)
     cm_deals_final_df, no_deal_id_final, cm_db_not_exist = get_cm_db_deals(no_deals_df,
                                                                            phone_number_df,
-                                                                           df_exploded,
+                                                                           phone_deals_df,
                                                                            cm_db_df)
     export_fu(fu_df, cm_deals_final_df, save_path, i, output_type)
 
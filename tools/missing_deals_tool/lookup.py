@@ -1,7 +1,8 @@
 import os
 import pandas as pd
 from datetime import datetime
-from .get_pipedrive_data import main as update_pipedrive
+from tools.shared.pipedrive_sync import main as update_pipedrive
+from tools.shared.phone_deal_index import load_phone_deal_index, get_deal_strings
 import xlwings as xw
 
 def read_file(path: str, name: str) -> pd.DataFrame:
@@ -14,48 +15,44 @@ def format_phone(lookup_df: pd.DataFrame) -> pd.DataFrame:
     filtered_df = lookup_df[lookup_df['Deal ID'].isna()]
     if 'From' in filtered_df.columns:
         phone_column = 'From'
-        filtered_df['phone'] = filtered_df[phone_column]
-        filtered_df['phone'] = filtered_df['phone'].astype(str).apply(lambda x: x[1:] if len(x) == 11 else x)
-        filtered_df['phone'] = pd.to_numeric(filtered_df['phone'], errors='coerce').astype('Int64').astype(str)
+        country_code_length = 11
     else:
         phone_column = 'ANI'
-        filtered_df['phone'] = filtered_df[phone_column]
-        filtered_df['phone'] = filtered_df['phone'].astype(str).apply(lambda x: x[1:] if len(x) == 13 else x)
-        filtered_df['phone'] = pd.to_numeric(filtered_df['phone'], errors='coerce').astype('Int64').astype(str)
+        country_code_length = 13
+
+    # Strip the leading country code character, then normalise the digits through Int64
+    phones = filtered_df[phone_column].astype(str)
+    phones = phones.where(phones.str.len() != country_code_length, phones.str[1:])
+    filtered_df['phone'] = pd.to_numeric(phones, errors='coerce').astype('Int64').astype(str)
 
     return filtered_df, phone_column
 
-def format_pipedrive_data(pipedrive_df: pd.DataFrame) -> dict:
-    print("Formatting Pipedrive data")
+def get_phone_to_deal(lookup_df: pd.DataFrame, phone_deal_index: dict) -> dict:
+
+    # Deal IDs for this sheet's phones only, read from the shared phone-to-deal index
+    deal_strings = get_deal_strings(phone_deal_index, lookup_df['phone'])
+    matched = deal_strings.notna()
+    return dict(zip(lookup_df.loc[matched, 'phone'], deal_strings[matched]))
+
+def fill_text_lookup(lookup_df: pd.DataFrame, phone_to_deal: dict) -> None:
 
-    pipedrive_df['phone_number'] = pipedrive_df['phone_number'].fillna('').astype(str)
-    pipedrive_df = pipedrive_df[pipedrive_df['phone_number'].str.strip() != '']
-    pipedrive_df['phone_number'] = pipedrive_df['phone_number'].str.split(',')
-    pipedrive_df['phone_number'] = pipedrive_df['phone_number'].apply(
-        lambda x: sorted(set(x), key=x.index)
-    )
+    # Rows still missing a deal take the matched deal IDs and are marked resolved
+    matched_deal = lookup_df['phone'].map(phone_to_deal)
+    resolved = lookup_df['Deal ID'].isna() & matched_deal.notna()
+    lookup_df['Deal ID'] = lookup_df['Deal ID'].astype(object).mask(resolved, matched_deal)
+    lookup_df['Resolved By'] = lookup_df['Resolved By'].astype(object).mask(resolved, 'Joyce Marie Gempesaw')
 
-    pipedrive_final_data = pipedrive_df.explode('phone_number').reset_index(drop=True)
-    pipedrive_final_data['phone_number'] = pipedrive_final_data['phone_number'].str.replace(r'\D', '', regex=True)
-    pipedrive_final_data = pipedrive_final_data[pipedrive_final_data['phone_number'] != '']
+def fill_call_lookup(lookup_df: pd.DataFrame, phone_to_deal: dict) -> None:
 
-    grouped_df = (
-        pipedrive_final_data.groupby('phone_number')['Deal - ID']
-        .agg(lambda row: " | ".join(row.astype(str).unique()))
-        .reset_index()
-    )
-    phone_to_deal = grouped_df.set_index('phone_number')['Deal - ID'].to_dict()
-    return phone_to_deal
+    # Same as fill_text_lookup, calls also record the resolve date
+    matched_deal = lookup_df['phone'].map(phone_to_deal)
+    resolved = lookup_df['Deal ID'].isna() & matched_deal.notna()
+    lookup_df['Deal ID'] = lookup_df['Deal ID'].astype(object).mask(resolved, matched_deal)
+    lookup_df['Resolved by'] = lookup_df['Resolved by'].astype(object).mask(resolved, 'Joyce Marie Gempesaw')
+    lookup_df['Resolve Date'] = lookup_df['Resolve Date'].astype(object).mask(resolved, datetime.today().strftime('%m/%d/%Y'))
 
 def lookup_text(lookup_df: pd.DataFrame, phone_column: str, phone_to_deal: dict, save_path: str, i: int) -> None:
-    lookup_df[['Deal ID', 'Resolved By']] = lookup_df.apply(
-        lambda row: (
-            phone_to_deal.get(row['phone'], row['Deal ID']) if pd.isna(row['Deal ID']) else row['Deal ID'], 
-            'Joyce Marie Gempesaw' if pd.isna(row['Deal ID']) and row['phone'] in phone_to_deal else row['Resolved By']
-        ),
-        axis=1,
-        result_type='expand'
-    )
+    fill_text_lookup(lookup_df, phone_to_deal)
 
     with xw.App(visible=False) as app:
         wb = app.books.open(save_path)
@@ -65,15 +62,7 @@ def lookup_text(lookup_df: pd.DataFrame, phone_column: str, phone_to_deal: dict,
         wb.save()
 
 def lookup_call(lookup_df: pd.DataFrame, phone_column: str, phone_to_deal: dict, save_path: str, i: int) -> None:
-    lookup_df[['Deal ID', 'Resolved by', 'Resolve Date']] = lookup_df.apply(
-        lambda row: (
-            phone_to_deal.get(row['phone'], row['Deal ID']) if pd.isna(row['Deal ID']) else row['Deal ID'], 
-            'Joyce Marie Gempesaw' if pd.isna(row['Deal ID']) and row['phone'] in phone_to_deal else row['Resolved by'],   
-            datetime.today().strftime('%m/%d/%Y') if pd.isna(row['Deal ID']) and row['phone'] in phone_to_deal else row['Resolve Date']
-        ),
-        axis=1,
-        result_type='expand'
-    )
+    fill_call_lookup(lookup_df, phone_to_deal)
 
     with xw.App(visible=False) as app:
         wb = app.books.open(save_path)
@@ -85,8 +74,7 @@ def lookup_call(lookup_df: pd.DataFrame, phone_column: str, phone_to_deal: dict,
 def main(files: tuple, save_path: str):
     try:
         update_pipedrive()
-        pipedrive_df = pd.read_csv('./data/pipedrive/pipedrive_data.csv', low_memory=False)
-        phone_to_deal_dict = format_pipedrive_data(pipedrive_df)
+        phone_deal_index = load_phone_deal_index()
 
         for i, file in enumerate(files, start=1):
             print(f"Processing {os.path.basename(file)}")
@@ -94,6 +82,7 @@ def main(files: tuple, save_path: str):
             for name in ['raw_calls', 'raw_texts']:
                 df = read_file(file, name)
                 formatted_df, phone_column = format_phone(df)
+                phone_to_deal_dict = get_phone_to_deal(formatted_df, phone_deal_index)
                 if 'Resolve Date' in formatted_df.columns:
                     lookup_call(formatted_df, phone_column, phone_to_deal_dict, file, i) 
                 else:
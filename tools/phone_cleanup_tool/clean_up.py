@@ -1,8 +1,9 @@
-import re
 import os
 import dropbox
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from tools.autodialer_cleanup_tool.phone_index import PHONE_SHEETS, ID_SHEET, load_sheet_index, download_sheet, isin_index
 
 def download_list_cleaner(auth_code: str) -> None:
     global dnc_df, mvp_df, db_id_df, time_df, conv_df
@@ -19,17 +20,9 @@ def download_list_cleaner(auth_code: str) -> None:
         "PDJRAADups (PD)"
     ]
 
+    dbx = dropbox.Dropbox(auth_code)
     for sheet_name in sheet_names:
-        dropbox_path = f"/List Cleaner & JC DNC/{sheet_name}.csv"
-        local_file_path = f"./data/{sheet_name}.csv"
-        dbx = dropbox.Dropbox(auth_code)
-        metadata, response = dbx.files_download(dropbox_path)
-
-        with open(local_file_path, 'wb') as f:
-            f.write(response.content)
-
-def is_valid_phone(phone):
-    return bool(re.fullmatch(r'\d{10,15}', phone))
+        download_sheet(dbx, sheet_name)
 
 def read_file(path: str):
 
@@ -165,39 +158,22 @@ def apply_all_filters(df: pd.DataFrame, run_mode: str) -> pd.DataFrame:
 
     return df_longest_reason
 
-def get_phone_set(run_mode: str) -> set:
+def get_phone_indexes(run_mode: str) -> 'list[np.ndarray]':
 
-    data_path = './data'
-    file_list = [
-        "CCM+CH+MVPC+MVPT+JC+RC+PD (Cold).csv",
-        "DNC (Cold-PD).csv",
-        "CallOut-14d+TextOut-30d (Cold).csv",
-        "CallTextOut-7d (PD).csv",
-        "PDConvDup (PD).csv",
-        "PDJRAADups (PD).csv"
-    ]
+    sheet_names = list(PHONE_SHEETS)
     if run_mode == 'recleaning':
-        file_list.remove('CallOut-14d+TextOut-30d.csv')
-        
-    final_list_cleaner_df = pd.concat([pd.read_csv(os.path.join(data_path, file), low_memory=False, header=None) for file in file_list], ignore_index=True)
-
-    # Clean up the list and filter for valid phone numbers
-    valid_phone_set = set(int(phone) for phone in map(str, final_list_cleaner_df[0].tolist()) if is_valid_phone(phone))
-    return valid_phone_set
+        sheet_names.remove("CallOut-14d+TextOut-30d (Cold)")
 
-def get_id_set() -> set:
+    return [load_sheet_index(sheet_name) for sheet_name in sheet_names]
 
-    unique_db_df = pd.read_csv('./data/UniqueDB ID (Cold).csv', low_memory=False)
-    valid_numbers = pd.to_numeric(unique_db_df['Deal - Unique Database ID'], errors='coerce')
-    valid_numbers = valid_numbers.dropna().astype(int)
-    valid_id_set = set(valid_numbers)
-    return valid_id_set
+def get_id_index() -> np.ndarray:
+    return load_sheet_index(ID_SHEET)
 
-def clean_contact_id(df: pd.DataFrame, id_set: set) -> pd.DataFrame:
+def clean_contact_id(df: pd.DataFrame, id_index: np.ndarray) -> pd.DataFrame:
 
     if 'contact_id' in df.columns:
         df['contact_id'] = df['contact_id'].apply(pd.to_numeric, errors='coerce').astype('Int64')
-        df = df[~df['contact_id'].isin(id_set)]
+        df = df[~isin_index(df['contact_id'], [id_index])]
 
     return df
 
@@ -238,8 +214,8 @@ def main(auth_code: str, files: tuple, save_path: str, run_mode: str):
     try:
         download_list_cleaner(auth_code)
 
-        valid_phone_set = get_phone_set(run_mode)
-        valid_id_set = get_id_set()
+        valid_phone_indexes = get_phone_indexes(run_mode)
+        valid_id_index = get_id_index()
 
         for file in files:
 
@@ -247,8 +223,8 @@ def main(auth_code: str, files: tuple, save_path: str, run_mode: str):
 
             df = read_file(file)
             filtered_df = apply_all_filters(df, run_mode)
-            output_df = filtered_df[filtered_df['phone_number'].isin(valid_phone_set) == False]
-            final_df = clean_contact_id(output_df, valid_id_set)
+            output_df = filtered_df[~isin_index(filtered_df['phone_number'], valid_phone_indexes)]
+            final_df = clean_contact_id(output_df, valid_id_index)
 
             export_output(final_df, file, save_path)
         
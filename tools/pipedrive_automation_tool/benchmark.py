@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+import numpy as np
+import pandas as pd
+from tools.shared.mirror import MirrorConnection
+from .pipedrive_automation import split_id, enrich_row, enrich_per_row, enrich_concurrent, enrich_batched
+
+# Run with: python -m tools.pipedrive_automation_tool.benchmark [rows ...]
+
+def build_stand_in(path: str, contact_count: int, seed: int = 0) -> None:
+
+    rng = np.random.default_rng(seed)
+    row_count = contact_count * 2
+    contact_ids = rng.integers(1, contact_count + 1, size=row_count).tolist()
+    tables = {
+        'contact_serial_numbers': {
+            'serial_number': rng.choice(['SN-1001', 'SN-1002', 'SN-1003', 'MUS-1', 'CMS-1'], size=row_count).tolist()
+        },
+        'contact_skip_traced_addresses': {
+            'address': [f"{number} MAIN ST" for number in rng.integers(1, 9999, size=row_count)],
+            'city': rng.choice(['AUSTIN', 'MIDLAND', None], size=row_count).tolist(),
+            'state': ['TX'] * row_count,
+            'postal_code': ['78701'] * row_count
+        },
+        'contact_phone_numbers': {
+            'phone_number': rng.integers(2_000_000_000, 9_999_999_999, size=row_count).astype(str).tolist(),
+            'phone_index': rng.integers(1, 4, size=row_count).tolist()
+        },
+        'contact_email_addresses': {
+            'email_address': [f"owner{number}@example.com" for number in rng.integers(0, contact_count, size=row_count)]
+        }
+    }
+
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE contacts (id INTEGER PRIMARY KEY)')
+    connection.executemany('INSERT INTO contacts VALUES (?)', [(contact_id,) for contact_id in range(1, contact_count + 1)])
+
+    for table, columns in tables.items():
+        column_names = ', '.join(columns)
+        connection.execute(f'CREATE TABLE {table} (id INTEGER PRIMARY KEY, contact_id INTEGER, {column_names})')
+        connection.executemany(
+            f'INSERT INTO {table} (contact_id, {column_names}) VALUES ({", ".join(["?"] * (len(columns) + 1))})',
+            zip(contact_ids, *columns.values())
+        )
+        connection.execute(f'CREATE INDEX {table}_contact_id ON {table} (contact_id)')
+
+    connection.commit()
+    connection.close()
+
+def make_synthetic_export(row_count: int, contact_count: int, seed: int = 1) -> pd.DataFrame:
+
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Deal - Unique Database ID': [
+            " | ".join(map(str, rng.integers(1, contact_count + 1, size=rng.integers(1, 4))))
+            for _ in range(row_count)
+        ],
+        'Deal - Serial Number': rng.choice([None, 'SN-2001', 'SN-2001 | SN-1001'], size=row_count),
+        'Person - Mailing Address': rng.choice([None, '1 OLD RD, AUSTIN, TX, 78701, USA'], size=row_count),
+        'Person - Phone - Work': np.nan,
+        'Person - Phone - Home': np.nan,
+        'Person - Phone - Mobile': np.nan,
+        'Person - Phone - Other': np.nan,
+        'Person - Phone 1': np.where(rng.random(row_count) < 0.3, 5_551_112_222, np.nan),
+        'Person - Email 1': rng.choice([None, 'owner@example.com'], size=row_count)
+    })
+
+    df['new_id'] = df['Deal - Unique Database ID'].apply(split_id)
+    df['new_serials'] = ''
+    df['Notes'] = ''
+    df['Person - Email'] = ''
+    df['Person - Phone'] = ''
+    return df
+
+def legacy_enrich_per_row(df: pd.DataFrame, connection) -> None:
+
+    # Same queries as enrich_per_row but written back one cell at a time, as before
+    with connection.cursor() as cursor:
+        for i, row in df.iterrows():
+            for column, value in enrich_row(row.get('new_id'), cursor, row).items():
+                df.loc[i, column] = value
+
+def time_enrichment(enrich, df: pd.DataFrame, connection) -> 'tuple[pd.DataFrame, float]':
+    df = df.copy()
+    start = time.perf_counter()
+    enrich(df, connection)
+    return df, time.perf_counter() - start
+
+def main(row_counts: 'list[int]') -> None:
+
+    for row_count in row_counts:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            database_path = os.path.join(temp_dir, 'stand_in.db')
+            contact_count = max(row_count // 2, 10)
+            build_stand_in(database_path, contact_count)
+            df = make_synthetic_export(row_count, contact_count)
+            connection = MirrorConnection(database_path)
+
+            print(f"Synthetic export: {row_count:,} rows, {contact_count:,} contacts")
+            legacy_df, legacy_seconds = time_enrichment(legacy_enrich_per_row, df, connection)
+            print(f"Per-row, per-cell writes: {legacy_seconds:.2f}s")
+
+            buffered_df, buffered_seconds = time_enrichment(enrich_per_row, df, connection)
+            print(f"Per-row, column buffers:  {buffered_seconds:.2f}s")
+
+            def enrich_concurrent_stand_in(df: pd.DataFrame, connection) -> None:
+                enrich_concurrent(df, connect=lambda: MirrorConnection(database_path), max_workers=8)
+
+            concurrent_df, concurrent_seconds = time_enrichment(enrich_concurrent_stand_in, df, connection)
+            print(f"Per-row, concurrent:      {concurrent_seconds:.2f}s")
+
+            batched_df, batched_seconds = time_enrichment(enrich_batched, df, connection)
+            print(f"Batched:                  {batched_seconds:.2f}s")
+
+            pd.testing.assert_frame_equal(buffered_df, legacy_df[buffered_df.columns], check_dtype=False)
+            pd.testing.assert_frame_equal(concurrent_df, buffered_df)
+            connection.close()
+
+if __name__ == "__main__":
+    main([int(row_count) for row_count in sys.argv[1:]] or [10_000, 100_000])
@@ -1,9 +1,13 @@
 import os
+import threading
+import numpy as np
 import pandas as pd
-import pymysql
 import warnings
 from dotenv import load_dotenv
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor
+from tools.shared.database import get_raw_connection, get_max_connections
+from tools.shared.mirror import use_mirror, sync_mirror, get_mirror_connection
 
 def read_file(path: str) -> pd.DataFrame:
 
@@ -16,29 +20,79 @@ def read_file(path: str) -> pd.DataFrame:
     else:
         return None
 
-def connect_to_db():
+# Contact IDs per IN (...) query in batched mode
+ID_CHUNK_SIZE = 1000
+
+batched_serials_query = """
+SELECT
+    contact_id,
+    serial_number
+FROM
+    contact_serial_numbers
+WHERE 1=1
+    AND contact_id IN ({placeholders})
+    AND serial_number NOT LIKE '%%MUS%%'
+    AND serial_number NOT LIKE '%%CMS%%';
+"""
+
+batched_address_query = """
+SELECT
+    id,
+    contact_id,
+    address,
+    city,
+    state,
+    postal_code
+FROM
+    contact_skip_traced_addresses
+WHERE 1=1
+    AND contact_id IN ({placeholders})
+    AND address IS NOT NULL
+    AND city IS NOT NULL
+    AND state IS NOT NULL
+    AND postal_code IS NOT NULL;
+"""
+
+batched_phone_number_query = """
+SELECT
+    id,
+    contact_id,
+    phone_number,
+    phone_index
+FROM
+    contact_phone_numbers
+WHERE 1=1
+    AND contact_id IN ({placeholders})
+    AND phone_number IS NOT NULL
+    AND phone_index IS NOT NULL;
+"""
+
+batched_email_query = """
+SELECT
+    id,
+    contact_id,
+    email_address
+FROM
+    contact_email_addresses
+WHERE 1=1
+    AND contact_id IN ({placeholders})
+    AND email_address IS NOT NULL;
+"""
 
-    host = os.getenv('DB_HOST')
-    user = os.getenv('DB_USER')
-    name = os.getenv('DB_NAME')
-    password = os.getenv('DB_PASSWORD')
+def connect_to_db():
 
-    connection = pymysql.connect(
-        host=host,
-        user=user,
-        database=name,
-        password=password,
-    )
+    # Local mirror connection when CM_MIRROR is on, queries are translated to SQLite by its cursor
+    if use_mirror():
+        return get_mirror_connection()
 
-    return connection
+    # Pooled PyMySQL connection, closing it returns it to the shared pool
+    return get_raw_connection()
 
 def get_serials(
         database_id: str,
-        df: pd.DataFrame,
         cursor,
-        row,
-        i
-    ) -> None:
+        row
+    ) -> dict:
 
     serials_query = f"""
     SELECT
@@ -72,15 +126,13 @@ def get_serials(
                 unique_serials.add(serial)
 
     # Join the unique serials and store in 'new_serials'
-    df.loc[i, 'new_serials'] = " | ".join(unique_serials)
+    return {'new_serials': " | ".join(unique_serials)}
 
 def get_mailing_address(
         database_id: str,
-        df: pd.DataFrame,
         cursor,
-        row,
-        i
-    ) -> None:
+        row
+    ) -> dict:
 
     address_query = f"""
     SELECT
@@ -110,15 +162,15 @@ def get_mailing_address(
         else:
             new_address = None
 
-        df.loc[i, 'Person - Mailing Address'] = new_address
+        return {'Person - Mailing Address': new_address}
+
+    return {}
 
 def get_phone_number(
         database_id: str,
-        df: pd.DataFrame,
         cursor,
-        row,
-        i
-    ) -> None:
+        row
+    ) -> dict:
 
     phone_number_query = f"""
     SELECT 
@@ -145,17 +197,19 @@ def get_phone_number(
 
         cursor.execute(phone_number_query)
         result = cursor.fetchall()
-        df.loc[i, 'Person - Phone'] = ", ".join([str(phone[0]) for phone in result])
+        values = {'Person - Phone': ", ".join([str(phone[0]) for phone in result])}
         for phone_index, phone in enumerate(result, start=1):
-            df.loc[i, f'Person - Phone {phone_index}'] = int(phone[0])
+            values[f'Person - Phone {phone_index}'] = int(phone[0])
+
+        return values
+
+    return {}
 
 def get_email_address(
         database_id: str,
-        df: pd.DataFrame,
         cursor,
-        row,
-        i
-    ) -> None:
+        row
+    ) -> dict:
 
     email_query = f"""
     SELECT
@@ -173,9 +227,203 @@ def get_email_address(
         cursor.execute(email_query)
         result = cursor.fetchall()
         if result:
-            df.loc[i, 'Person - Email'] = result[0][0]
+            values = {'Person - Email': result[0][0]}
             for index, email in enumerate(result[:17], start=1):
-                df.loc[i, f'Person - Email {index}'] = email[0]
+                values[f'Person - Email {index}'] = email[0]
+
+            return values
+
+    return {}
+
+def get_column(df: pd.DataFrame, column: str) -> pd.Series:
+    # Same as row.get() in the per-row helpers, a missing column reads as empty
+    return df[column] if column in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+def get_contact_ids(df: pd.DataFrame, mask: 'pd.Series | None' = None) -> pd.DataFrame:
+
+    # One (row, contact_id) pair per ID in each row's new_id list
+    new_ids = df['new_id'] if mask is None else df.loc[mask, 'new_id']
+    contact_ids = pd.to_numeric(new_ids.str.split(', ').explode(), errors='coerce').dropna()
+    return pd.DataFrame({'row': contact_ids.index, 'contact_id': contact_ids.to_numpy(dtype='int64')})
+
+def fetch_in_chunks(cursor, query: str, contact_ids: pd.DataFrame, columns: list) -> pd.DataFrame:
+
+    unique_ids = np.unique(contact_ids['contact_id']).tolist()
+    results = []
+    for start in range(0, len(unique_ids), ID_CHUNK_SIZE):
+        chunk = unique_ids[start:start + ID_CHUNK_SIZE]
+        cursor.execute(query.format(placeholders=', '.join(['%s'] * len(chunk))), chunk)
+        results.extend(cursor.fetchall())
+
+    # Join the rows back to every frame row that asked for their contact
+    result_df = pd.DataFrame(list(results), columns=columns)
+    result_df['contact_id'] = pd.to_numeric(result_df['contact_id']).astype('int64')
+    return contact_ids.merge(result_df, on='contact_id')
+
+def get_batched_serials(df: pd.DataFrame, cursor) -> dict:
+
+    contact_ids = get_contact_ids(df)
+    serials_df = fetch_in_chunks(cursor, batched_serials_query, contact_ids, ['contact_id', 'serial_number'])
+    db_serials = serials_df.groupby('row')['serial_number'].agg(lambda serials: sorted(set(map(str, serials))))
+    db_serials = db_serials.reindex(df.index)
+
+    # Database serials first, then the ones already on the deal
+    new_serials = [
+        " | ".join(dict.fromkeys((serials if isinstance(serials, list) else []) + (str(existing).split(" | ") if pd.notna(existing) else [])))
+        for serials, existing in zip(db_serials, get_column(df, 'Deal - Serial Number'))
+    ]
+
+    return {'new_serials': pd.Series(new_serials, index=df.index)}
+
+def get_batched_mailing_addresses(df: pd.DataFrame, cursor) -> dict:
+
+    missing_mask = get_column(df, 'Person - Mailing Address').isna()
+    contact_ids = get_contact_ids(df, missing_mask)
+    address_df = fetch_in_chunks(cursor, batched_address_query, contact_ids, ['id', 'contact_id', 'address', 'city', 'state', 'postal_code'])
+
+    # First address in contact order, as the LIMIT 1 lookup returned it
+    address_df = address_df.sort_values(['row', 'contact_id', 'id'], kind='stable').drop_duplicates('row')
+    new_addresses = (
+        address_df['address'].astype(str) + ', ' + address_df['city'].astype(str) + ', '
+        + address_df['state'].astype(str) + ', ' + address_df['postal_code'].astype(str) + ', USA'
+    ).str.upper()
+
+    mailing_addresses = pd.Series(None, index=df.index[missing_mask], dtype=object)
+    mailing_addresses.loc[address_df['row'].to_numpy()] = new_addresses.to_numpy()
+    return {'Person - Mailing Address': mailing_addresses}
+
+def get_batched_phone_numbers(df: pd.DataFrame, cursor) -> dict:
+
+    columns_to_check = [
+        'Person - Phone - Work',
+        'Person - Phone - Home',
+        'Person - Phone - Mobile',
+        'Person - Phone - Other',
+        'Person - Phone 1'
+    ]
+
+    missing_mask = df[columns_to_check].isna().all(axis=1)
+    contact_ids = get_contact_ids(df, missing_mask)
+    phone_df = fetch_in_chunks(cursor, batched_phone_number_query, contact_ids, ['id', 'contact_id', 'phone_number', 'phone_index'])
+
+    # Distinct phones per row ordered by phone index
+    phone_df = phone_df.sort_values(['row', 'phone_index', 'contact_id', 'id'], kind='stable')
+    phone_df = phone_df.drop_duplicates(['row', 'phone_number'])
+    phone_df['slot'] = phone_df.groupby('row').cumcount() + 1
+
+    columns = {'Person - Phone': phone_df.groupby('row')['phone_number'].agg(lambda phones: ", ".join(map(str, phones)))}
+    for slot, slot_df in phone_df.groupby('slot'):
+        columns[f'Person - Phone {slot}'] = slot_df.set_index('row')['phone_number'].map(int)
+
+    return columns
+
+def get_batched_email_addresses(df: pd.DataFrame, cursor) -> dict:
+
+    missing_mask = get_column(df, 'Person - Email 1').isna()
+    contact_ids = get_contact_ids(df, missing_mask)
+    email_df = fetch_in_chunks(cursor, batched_email_query, contact_ids, ['id', 'contact_id', 'email_address'])
+
+    # Distinct emails per row, first 17 go to the numbered columns
+    email_df = email_df.sort_values(['row', 'contact_id', 'id'], kind='stable')
+    email_df = email_df.drop_duplicates(['row', 'email_address'])
+    email_df['slot'] = email_df.groupby('row').cumcount() + 1
+    email_df = email_df[email_df['slot'] <= 17]
+
+    columns = {'Person - Email': email_df[email_df['slot'] == 1].set_index('row')['email_address']}
+    for slot, slot_df in email_df.groupby('slot'):
+        columns[f'Person - Email {slot}'] = slot_df.set_index('row')['email_address']
+
+    return columns
+
+def assign_columns(df: pd.DataFrame, columns: dict) -> None:
+
+    # Each output column is written once, new columns start out empty
+    for column, values in columns.items():
+        if column in df.columns:
+            column_values = df[column].astype(object)
+        else:
+            column_values = pd.Series(np.nan, index=df.index, dtype=object)
+
+        column_values.loc[values.index] = values.astype(object).to_numpy()
+        df[column] = column_values.infer_objects()
+
+def enrich_batched(df: pd.DataFrame, connection) -> None:
+
+    # One set-based query per table instead of four queries per row
+    with connection.cursor() as cursor:
+        columns = get_batched_serials(df, cursor)
+        columns.update(get_batched_mailing_addresses(df, cursor))
+        columns.update(get_batched_phone_numbers(df, cursor))
+        columns.update(get_batched_email_addresses(df, cursor))
+
+    assign_columns(df, columns)
+
+def enrich_row(database_id: str, cursor, row) -> dict:
+
+    values = get_serials(database_id, cursor, row)
+    values.update(get_mailing_address(database_id, cursor, row))
+    values.update(get_phone_number(database_id, cursor, row))
+    values.update(get_email_address(database_id, cursor, row))
+    return values
+
+def enrich_per_row(df: pd.DataFrame, connection) -> None:
+
+    # Results are buffered per column and written to the frame once at the end
+    buffers = {}
+    with connection.cursor() as cursor:
+        for i, row in tqdm(df.iterrows(), total=df.shape[0], unit='entry'):
+
+            database_id = row.get('new_id')
+            for column, value in enrich_row(database_id, cursor, row).items():
+                buffers.setdefault(column, {})[i] = value
+
+    assign_columns(df, {column: pd.Series(values, dtype=object) for column, values in buffers.items()})
+
+def get_max_concurrency() -> int:
+    # Rows looked up at once in concurrent mode, capped by what the connection pool can hand out
+    return max(1, min(int(os.getenv('PIPEDRIVE_MAX_CONCURRENCY', 8)), get_max_connections()))
+
+ENRICH_MODES = ('batched', 'concurrent', 'per_row')
+
+def get_enrich_mode() -> str:
+    # Lookup strategy from PIPEDRIVE_ENRICH_MODE, anything unknown falls back to batched
+    mode = os.getenv('PIPEDRIVE_ENRICH_MODE', 'batched').strip().lower()
+    if mode not in ENRICH_MODES:
+        print(f"Unknown PIPEDRIVE_ENRICH_MODE '{mode}', using batched")
+        return 'batched'
+    return mode
+
+def enrich_concurrent(df: pd.DataFrame, connect=connect_to_db, max_workers: 'int | None' = None) -> None:
+
+    # Same per-row queries as enrich_per_row, each worker thread keeps its own pooled connection
+    thread_state = threading.local()
+    connections = []
+    connections_lock = threading.Lock()
+
+    def enrich_with_thread_connection(item):
+        i, row = item
+        if not hasattr(thread_state, 'connection'):
+            thread_state.connection = connect()
+            with connections_lock:
+                connections.append(thread_state.connection)
+
+        with thread_state.connection.cursor() as cursor:
+            return i, enrich_row(row.get('new_id'), cursor, row)
+
+    buffers = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers or get_max_concurrency()) as executor:
+            # map() yields results in row order, so the merge matches per-row mode
+            results = executor.map(enrich_with_thread_connection, df.iterrows())
+            for i, values in tqdm(results, total=df.shape[0], unit='entry'):
+                for column, value in values.items():
+                    buffers.setdefault(column, {})[i] = value
+
+    finally:
+        for connection in connections:
+            connection.close()
+
+    assign_columns(df, {column: pd.Series(values, dtype=object) for column, values in buffers.items()})
 
 def get_timezone(row, tz_dict: dict):
     phone_number = row.get('Person - Phone 1')
@@ -228,11 +476,21 @@ def export_file(df: pd.DataFrame, save_path: str, file: str):
     elif filename.endswith('.xlsx'):
         df.to_excel(f"{save_path}/(Automation Output) {filename}", index=False)
 
-def main(files: tuple, save_path: str):
+def main(files: tuple, save_path: str, mode: 'str | None' = None):
+
+    connection = None
 
     try:
         load_dotenv(dotenv_path='./misc/.env')
         warnings.filterwarnings("ignore", category=FutureWarning)
+        mode = mode or get_enrich_mode()
+
+        if use_mirror():
+            sync_mirror()
+
+        # Concurrent mode checks out its own connections
+        if mode != 'concurrent':
+            connection = connect_to_db()
 
         for file in files:
             print(f"Processing {os.path.basename(file)}")
@@ -243,17 +501,14 @@ def main(files: tuple, save_path: str):
             df['Notes'] = ''
             df['Person - Email'] = ''
             df['Person - Phone'] = ''
-            connection = connect_to_db()
 
-            with connection.cursor() as cursor:
-                for i, row in tqdm(df.iterrows(), total=df.shape[0], unit='entry'):
+            if mode == 'batched':
+                enrich_batched(df, connection)
+            elif mode == 'concurrent':
+                enrich_concurrent(df)
+            else:
+                enrich_per_row(df, connection)
 
-                    database_id = row.get('new_id')
-                    get_serials(database_id, df, cursor, row, i)
-                    get_mailing_address(database_id, df, cursor, row, i)
-                    get_phone_number(database_id, df, cursor, row, i)
-                    get_email_address(database_id, df, cursor, row, i)
-                        
             add_constants(df)
             export_file(df, save_path, file)
 
@@ -264,7 +519,8 @@ def main(files: tuple, save_path: str):
         raise RuntimeError
     
     finally:
-        connection.close()
+        if connection is not None:
+            connection.close()
 
 if __name__ == "__main__":
     main(None, None)
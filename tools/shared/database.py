@@ -0,0 +1,66 @@
+import os
+import atexit
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from urllib.parse import quote
+
+engine_lock = threading.Lock()
+engine = None
+
+def get_pool_size() -> int:
+    return int(os.getenv('DB_POOL_SIZE', 5))
+
+def get_max_overflow() -> int:
+    return int(os.getenv('DB_MAX_OVERFLOW', 5))
+
+def get_max_connections() -> int:
+    # Most connections the pool hands out at once
+    return get_pool_size() + get_max_overflow()
+
+def get_engine() -> Engine:
+    global engine
+
+    # One pooled engine per app session, created on first use after the .env file is loaded
+    with engine_lock:
+        if engine is None:
+            host = os.getenv('DB_HOST')
+            user = os.getenv('DB_USER')
+            name = os.getenv('DB_NAME')
+            password = os.getenv('DB_PASSWORD')
+            engine = create_engine(
+                f'mysql+pymysql://{user}:{quote(password)}@{host}/{name}',
+                pool_size=get_pool_size(),
+                max_overflow=get_max_overflow(),
+                pool_recycle=int(os.getenv('DB_POOL_RECYCLE', 3600)),
+                pool_pre_ping=True
+            )
+
+    return engine
+
+def dispose_engine() -> None:
+    global engine
+
+    with engine_lock:
+        if engine is not None:
+            engine.dispose()
+            engine = None
+
+atexit.register(dispose_engine)
+
+def get_raw_connection():
+    # DB-API connection checked out of the pool, close() hands it back
+    return get_engine().raw_connection()
+
+def read_sql_queries(queries: dict, params: 'dict | None' = None) -> 'dict[str, pd.DataFrame]':
+
+    # Independent queries run at the same time, each on its own pooled connection, params bind as :name
+    db_engine = get_engine()
+    with ThreadPoolExecutor(max_workers=max(1, min(len(queries), get_pool_size()))) as executor:
+        futures = {
+            name: executor.submit(pd.read_sql_query, text(query) if params else query, db_engine, params=params)
+            for name, query in queries.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
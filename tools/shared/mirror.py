@@ -0,0 +1,215 @@
+import os
+import re
+import sqlite3
+import threading
+import pandas as pd
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from tools.shared.database import get_engine
+
+MIRROR_PATH = './data/cm_mirror'
+MIRROR_DB = './data/cm_mirror/cm_mirror.db'
+
+# Columns the tools read from each mirrored table, id/updated_at/deleted_at drive the sync
+MIRROR_TABLES = {
+    'contacts': ['first_name', 'middle_name', 'last_name', 'deal_id'],
+    'contact_phone_numbers': ['contact_id', 'phone_number', 'phone_index'],
+    'contact_email_addresses': ['contact_id', 'email_address'],
+    'contact_serial_numbers': ['contact_id', 'serial_number'],
+    'contact_skip_traced_addresses': ['contact_id', 'address', 'city', 'state', 'postal_code', 'data_source'],
+    'contact_targets': ['contact_id', 'country', 'state'],
+    'contact_addresses': ['contact_id', 'source_address', 'source_city', 'source_state']
+}
+
+# Full resync cadence, catches hard deletes and rows changed without touching updated_at
+FULL_SYNC_DAYS = 7
+
+# Incremental reads start this far before the high-water mark to pick up late commits
+SYNC_OVERLAP = timedelta(hours=1)
+
+# Tools run back to back within this window share one sync
+SYNC_INTERVAL = timedelta(minutes=10)
+
+SYNC_CHUNKSIZE = 100_000
+
+mirror_lock = threading.Lock()
+
+def use_mirror() -> bool:
+    return os.getenv('CM_MIRROR', '0').strip().lower() in ('1', 'true', 'yes')
+
+def concat_ws(separator, *values):
+    # MySQL CONCAT_WS, NULL arguments are skipped
+    if separator is None:
+        return None
+    return str(separator).join(str(value) for value in values if value is not None)
+
+class GroupConcat:
+    # MySQL GROUP_CONCAT(... SEPARATOR ' | ') for SQLite
+    def __init__(self):
+        self.values = []
+
+    def step(self, value):
+        if value is not None:
+            self.values.append(str(value))
+
+    def finalize(self):
+        return " | ".join(self.values) if self.values else None
+
+class MirrorCursor:
+    # Translates the tools' MySQL cursor queries to SQLite before running them
+    def __init__(self, cursor: sqlite3.Cursor):
+        self.cursor = cursor
+
+    def execute(self, query: str, params: 'list | None' = None):
+        query = re.sub(r"GROUP_CONCAT\(DISTINCT (\S+) SEPARATOR ' \| '\)", r"group_concat_pipe(DISTINCT \1)", query)
+        query = query.replace('%%', '%').replace('%s', '?')
+        return self.cursor.execute(query, params or [])
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cursor.close()
+
+class MirrorConnection:
+    # DB-API style wrapper so cursor based tools can run on the mirror unchanged
+    def __init__(self, path: str = MIRROR_DB):
+        self.connection = connect_sqlite(path)
+
+    def cursor(self) -> MirrorCursor:
+        return MirrorCursor(self.connection.cursor())
+
+    def close(self) -> None:
+        self.connection.close()
+
+def connect_sqlite(path: str = MIRROR_DB) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.create_function('CONCAT_WS', -1, concat_ws, deterministic=True)
+    connection.create_aggregate('group_concat_pipe', 1, GroupConcat)
+    return connection
+
+def get_mirror_connection() -> MirrorConnection:
+    return MirrorConnection(MIRROR_DB)
+
+def read_sync_state(connection: sqlite3.Connection) -> dict:
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS mirror_state (
+            table_name TEXT PRIMARY KEY,
+            high_water_mark TEXT,
+            full_sync_at TEXT,
+            synced_at TEXT
+        )
+    """)
+    rows = connection.execute('SELECT table_name, high_water_mark, full_sync_at, synced_at FROM mirror_state').fetchall()
+    return {row[0]: {'high_water_mark': row[1], 'full_sync_at': row[2], 'synced_at': row[3]} for row in rows}
+
+def write_sync_state(connection: sqlite3.Connection, table: str, full_sync_at: str, synced_at: str) -> None:
+    high_water_mark = connection.execute(
+        f'SELECT MAX(MAX(COALESCE(updated_at, \'\')), MAX(COALESCE(deleted_at, \'\'))) FROM {table}'
+    ).fetchone()[0] or None
+    connection.execute(
+        'INSERT OR REPLACE INTO mirror_state VALUES (?, ?, ?, ?)',
+        (table, high_water_mark, full_sync_at, synced_at)
+    )
+
+def get_select_query(table: str) -> str:
+    columns = ', '.join(['id'] + MIRROR_TABLES[table] + ['updated_at', 'deleted_at'])
+    return f'SELECT {columns} FROM {table}'
+
+def read_source_chunks(query: str, params: 'dict | None' = None):
+
+    # Server-side cursor so a full resync never holds a whole table in memory
+    with get_engine().connect().execution_options(stream_results=True) as source:
+        for chunk in pd.read_sql_query(text(query), source, params=params, chunksize=SYNC_CHUNKSIZE):
+            yield chunk
+
+def create_indexes(connection: sqlite3.Connection, table: str) -> None:
+    connection.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {table}_id ON {table} (id)')
+    if 'contact_id' in MIRROR_TABLES[table]:
+        connection.execute(f'CREATE INDEX IF NOT EXISTS {table}_contact_id ON {table} (contact_id)')
+
+def full_sync_table(connection: sqlite3.Connection, table: str) -> int:
+
+    # Load into a staging table and swap it in, readers keep the old copy until the swap commits
+    staging = f'{table}__sync'
+    connection.execute(f'DROP TABLE IF EXISTS {staging}')
+    rows = 0
+    for chunk in read_source_chunks(get_select_query(table)):
+        chunk.to_sql(staging, connection, if_exists='append', index=False)
+        rows += len(chunk)
+
+    if rows == 0:
+        pd.DataFrame(columns=['id'] + MIRROR_TABLES[table] + ['updated_at', 'deleted_at']) \
+            .to_sql(staging, connection, if_exists='append', index=False)
+
+    connection.execute(f'DROP TABLE IF EXISTS {table}')
+    connection.execute(f'ALTER TABLE {staging} RENAME TO {table}')
+    create_indexes(connection, table)
+    return rows
+
+def incremental_sync_table(connection: sqlite3.Connection, table: str, high_water_mark: str) -> int:
+
+    # Rows touched since the last sync, soft deletes are kept so the tools' deleted_at filters still apply
+    since = (pd.Timestamp(high_water_mark) - SYNC_OVERLAP).to_pydatetime()
+    query = f'{get_select_query(table)} WHERE updated_at >= :since OR deleted_at >= :since'
+    staging = f'{table}__changes'
+    connection.execute(f'DROP TABLE IF EXISTS {staging}')
+    rows = 0
+    try:
+        for chunk in read_source_chunks(query, {'since': since}):
+            chunk.to_sql(staging, connection, if_exists='append', index=False)
+            rows += len(chunk)
+
+        if rows:
+            columns = ', '.join(['id'] + MIRROR_TABLES[table] + ['updated_at', 'deleted_at'])
+            connection.execute(f'INSERT OR REPLACE INTO {table} ({columns}) SELECT {columns} FROM {staging}')
+    finally:
+        # An empty pull still creates the staging table from its one empty chunk
+        connection.execute(f'DROP TABLE IF EXISTS {staging}')
+    return rows
+
+def sync_mirror(full: bool = False, tables: 'list[str] | None' = None) -> None:
+
+    with mirror_lock:
+        os.makedirs(MIRROR_PATH, exist_ok=True)
+        connection = sqlite3.connect(MIRROR_DB)
+        try:
+            state = read_sync_state(connection)
+            now = datetime.now()
+            for table in tables or MIRROR_TABLES:
+                entry = state.get(table)
+                if not full and entry and entry['synced_at'] \
+                        and now - datetime.fromisoformat(entry['synced_at']) < SYNC_INTERVAL:
+                    continue
+
+                needs_full = full or not entry or not entry['high_water_mark'] \
+                    or now - datetime.fromisoformat(entry['full_sync_at']) > timedelta(days=FULL_SYNC_DAYS)
+
+                if needs_full:
+                    rows = full_sync_table(connection, table)
+                    full_sync_at = now.isoformat(timespec='seconds')
+                else:
+                    rows = incremental_sync_table(connection, table, entry['high_water_mark'])
+                    full_sync_at = entry['full_sync_at']
+
+                write_sync_state(connection, table, full_sync_at, now.isoformat(timespec='seconds'))
+                connection.commit()
+                print(f"Mirrored {table}: {rows:,} rows ({'full' if needs_full else 'incremental'} sync)")
+        finally:
+            connection.close()
+
+def read_mirror_queries(queries: dict, params: 'dict | None' = None) -> 'dict[str, pd.DataFrame]':
+
+    # Same contract as read_sql_queries, answered from the local mirror after bringing it up to date
+    sync_mirror()
+    connection = connect_sqlite(MIRROR_DB)
+    try:
+        return {name: pd.read_sql_query(query, connection, params=params) for name, query in queries.items()}
+    finally:
+        connection.close()
@@ -0,0 +1,89 @@
+import os
+import numpy as np
+import pandas as pd
+
+PIPEDRIVE_DATA_PATH = './data/pipedrive/pipedrive_data.csv'
+PHONE_DEAL_INDEX_PATH = './data/pipedrive/phone_deal_index.npz'
+
+def to_phone_numbers(phones: pd.Series) -> np.ndarray:
+
+    # Digit-only strings become int64 phones, anything else is -1 and never matches
+    phones = phones.astype(str)
+    valid = phones.str.fullmatch(r'\d{1,18}')
+    return pd.to_numeric(phones.where(valid, '-1')).to_numpy(dtype='int64')
+
+def build_phone_deal_index(pipedrive_df: pd.DataFrame) -> dict:
+
+    # One (phone, deal) pair per comma separated phone, digits only, first appearance kept
+    exploded = pd.DataFrame({
+        'deal_id': pipedrive_df['Deal - ID'],
+        'phone': pipedrive_df['phone_number'].fillna('').astype(str).str.split(',')
+    }).explode('phone')
+    digits = exploded['phone'].str.replace(r'\D', '', regex=True)
+    valid = (exploded['deal_id'].notna() & digits.str.len().between(1, 18)).to_numpy()
+    pairs = pd.DataFrame({
+        'phone': pd.to_numeric(digits[valid]).astype('int64'),
+        'deal_id': exploded.loc[valid, 'deal_id'].astype('int64')
+    }).drop_duplicates()
+
+    # Sorted phones with CSR offsets into deal IDs, a stable sort keeps each phone's deals in Pipedrive order
+    order = np.argsort(pairs['phone'].to_numpy(), kind='stable')
+    sorted_phones = pairs['phone'].to_numpy()[order]
+    phones, starts = np.unique(sorted_phones, return_index=True)
+    index = {
+        'phones': phones,
+        'offsets': np.append(starts, len(sorted_phones)).astype('int64'),
+        'deal_ids': pairs['deal_id'].to_numpy()[order]
+    }
+
+    np.savez(PHONE_DEAL_INDEX_PATH, **index)
+    return index
+
+def load_phone_deal_index() -> dict:
+
+    # Rebuilt from the CSV when the index is missing or older than the last Pipedrive sync
+    if not os.path.exists(PHONE_DEAL_INDEX_PATH) \
+            or os.path.getmtime(PHONE_DEAL_INDEX_PATH) < os.path.getmtime(PIPEDRIVE_DATA_PATH):
+        pipedrive_df = pd.read_csv(PIPEDRIVE_DATA_PATH, usecols=['Deal - ID', 'phone_number'], dtype={'phone_number': str})
+        return build_phone_deal_index(pipedrive_df)
+
+    with np.load(PHONE_DEAL_INDEX_PATH) as arrays:
+        return {key: arrays[key] for key in arrays.files}
+
+def find_phones(index: dict, phones: pd.Series) -> np.ndarray:
+
+    # Position of each phone in the index, -1 when it has no deal
+    phone_numbers = to_phone_numbers(phones)
+    if len(index['phones']) == 0:
+        return np.full(len(phone_numbers), -1)
+
+    positions = np.minimum(np.searchsorted(index['phones'], phone_numbers), len(index['phones']) - 1)
+    found = (phone_numbers >= 0) & (index['phones'][positions] == phone_numbers)
+    return np.where(found, positions, -1)
+
+def match_phone_deals(index: dict, phones: pd.Series) -> 'tuple[np.ndarray, np.ndarray]':
+
+    # Row position and deal ID for every (row, deal) match, rows with several deals repeat
+    positions = find_phones(index, phones)
+    rows = np.flatnonzero(positions >= 0)
+    starts = index['offsets'][positions[rows]]
+    counts = index['offsets'][positions[rows] + 1] - starts
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(rows, counts), index['deal_ids'][np.repeat(starts, counts) + within]
+
+def get_deal_strings(index: dict, phones: pd.Series) -> pd.Series:
+
+    # " | " joined deal IDs per phone, None when the phone has no deal
+    positions = find_phones(index, phones)
+    deal_strings = np.full(len(positions), None, dtype=object)
+    matched = np.flatnonzero(positions >= 0)
+    starts = index['offsets'][positions[matched]]
+    counts = index['offsets'][positions[matched] + 1] - starts
+
+    # Most phones belong to one deal, only the rest need a join
+    single = counts == 1
+    deal_strings[matched[single]] = index['deal_ids'][starts[single]].astype(str)
+    for row, start, count in zip(matched[~single], starts[~single], counts[~single]):
+        deal_strings[row] = " | ".join(index['deal_ids'][start:start + count].astype(str))
+
+    return pd.Series(deal_strings, index=phones.index, dtype=object)
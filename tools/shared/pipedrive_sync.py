@@ -0,0 +1,488 @@
+import os
+import json
+import time
+import random
+import threading
+import concurrent.futures
+import requests
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+from tools.shared.phone_deal_index import build_phone_deal_index
+
+PIPEDRIVE_DATA_PATH = './data/pipedrive/pipedrive_data.csv'
+SYNC_STATE_PATH = './data/pipedrive/sync_state.json'
+
+# Full re-download cadence, also picks up renamed stages, pipelines and field options
+FULL_SYNC_DAYS = 7
+
+# Incremental syncs look back this far past the last sync to cover clock skew and in-flight edits
+SYNC_OVERLAP = timedelta(minutes=10)
+
+DEFAULT_BASE_URL = 'https://communityminerals-f099fc.pipedrive.com'
+PAGE_LIMIT = 500
+REQUEST_TIMEOUT = 60
+
+# Pages in flight start low and follow the x-ratelimit-remaining header up to the cap
+INITIAL_CONCURRENCY = 2
+MAX_CONCURRENCY = 8
+
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 1.0
+
+session_lock = threading.Lock()
+session = None
+
+METADATA_PATH = './data/pipedrive/metadata.json'
+
+# Field options, pipelines and stages rarely change, cached copies are reused for this long
+METADATA_TTL = timedelta(hours=24)
+
+# How long a stale cache waits on a refresh before it is used as is
+METADATA_TIMEOUT = 10
+
+metadata_lock = threading.Lock()
+metadata_refresh = None
+
+def get_deal_fields(endpoint):
+
+    url = f"{get_base_url()}/{endpoint}?api_token={PIPEDRIVE_API}"
+    params = {'start': 0, 'limit': 500}
+
+    response = get_session().get(url=url, params=params, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 200:
+        dict = response.json()
+        ca_tracking_flag_dict = {}
+        deal_status_dict = {}
+
+        for field in dict['data']:
+            if field['id'] == 12560:
+                for option in field['options']:
+                    ca_tracking_flag_dict[str(option['id'])] = option['label']
+
+            elif field['id'] == 12496:
+                for option in field['options']:
+                    deal_status_dict[str(option['id'])] = option['label']
+
+        ca_tracking_flag_dict[None] = None
+        deal_status_dict[None] = None
+
+        return ca_tracking_flag_dict, deal_status_dict
+
+    else:
+        print("Connection Failed")
+
+        return None, None
+    
+def get_pipelines(endpoint):
+
+    url = f"{get_base_url()}/{endpoint}?api_token={PIPEDRIVE_API}"
+    params = {'start': 0, 'limit': 500}
+
+    response = get_session().get(url=url, params=params, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 200:
+        dict = response.json()
+        pipeline_dict = {}
+
+        for pipeline in dict['data']:
+            pipeline_dict[pipeline['id']] = pipeline['name']
+
+        return pipeline_dict
+            
+    else:
+        print("Connection Failed")
+
+        return None
+    
+def get_deal_stages(endpoint):
+
+    url = f"{get_base_url()}/{endpoint}?api_token={PIPEDRIVE_API}"
+    params = {'start': 0, 'limit': 500}
+
+    response = get_session().get(url=url, params=params, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 200:
+        dict = response.json()
+        stages_dict = {}
+
+        for stage in dict['data']:
+            stages_dict[stage['id']] = stage['name']
+
+        return stages_dict
+
+    else:
+        print("Connection Failed")
+
+        return None
+
+def read_metadata_cache() -> 'dict | None':
+    if not os.path.exists(METADATA_PATH):
+        return None
+
+    with open(METADATA_PATH, 'r') as f:
+        cache = json.load(f)
+
+    # JSON keys are strings, option IDs stay strings while pipeline and stage IDs go back to ints
+    lookups = cache['lookups']
+    for name in ('ca_tracking_flag', 'deal_status'):
+        lookups[name] = {**lookups[name], None: None}
+    for name in ('pipelines', 'stages'):
+        lookups[name] = {int(key): value for key, value in lookups[name].items()}
+
+    return cache
+
+def write_metadata_cache(lookups: dict) -> None:
+    cache = {
+        'refreshed_at': datetime.now().isoformat(timespec='seconds'),
+        'lookups': {
+            name: {key: value for key, value in lookup.items() if key is not None}
+            for name, lookup in lookups.items()
+        }
+    }
+
+    with metadata_lock:
+        with open(METADATA_PATH, 'w') as f:
+            json.dump(cache, f, indent=4)
+
+def run_in_daemon_thread(function, *args) -> concurrent.futures.Future:
+
+    # Daemon thread rather than a pool worker, pool workers are joined at exit so a hung request would hold up closing the app
+    future = concurrent.futures.Future()
+
+    def run() -> None:
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+def refresh_metadata() -> dict:
+
+    # The three lookup endpoints are independent, so they are requested together
+    deal_fields = run_in_daemon_thread(get_deal_fields, "api/v1/dealFields")
+    pipelines = run_in_daemon_thread(get_pipelines, "api/v1/pipelines")
+    stages = run_in_daemon_thread(get_deal_stages, "api/v1/stages")
+    ca_tracking_flag, deal_status = deal_fields.result()
+    lookups = {
+        'ca_tracking_flag': ca_tracking_flag,
+        'deal_status': deal_status,
+        'pipelines': pipelines.result(),
+        'stages': stages.result()
+    }
+
+    failed = [name for name, lookup in lookups.items() if lookup is None]
+    if failed:
+        raise RuntimeError(f"Failed to load Pipedrive {', '.join(failed)} metadata")
+
+    write_metadata_cache(lookups)
+    return lookups
+
+def start_metadata_refresh() -> concurrent.futures.Future:
+    return run_in_daemon_thread(refresh_metadata)
+
+def load_metadata() -> dict:
+    global metadata_refresh
+
+    cache = read_metadata_cache()
+    if cache and datetime.now() - datetime.fromisoformat(cache['refreshed_at']) < METADATA_TTL:
+        return cache['lookups']
+
+    # Stale or missing, refresh in the background and fall back to the cached tables if the API is slow or down
+    if metadata_refresh is None or metadata_refresh.done():
+        metadata_refresh = start_metadata_refresh()
+
+    if cache is None:
+        return metadata_refresh.result()
+
+    try:
+        return metadata_refresh.result(timeout=METADATA_TIMEOUT)
+    except (concurrent.futures.TimeoutError, RuntimeError, requests.RequestException) as e:
+        print(f"Using cached Pipedrive metadata from {cache['refreshed_at']}: {str(e) or 'refresh timed out'}")
+        return cache['lookups']
+
+def decode_options(option_ids: pd.Series, labels: dict) -> pd.Series:
+
+    # Only the distinct option ID strings are split, mapped to labels and joined in their original order
+    codes, uniques = pd.factorize(option_ids)
+    exploded = pd.Series(uniques, dtype=object).str.split(',').explode()
+    mapped = exploded.map(labels).dropna()
+
+    # Labels spread out by position and concatenated column by column instead of joined one group at a time
+    position = mapped.groupby(level=0).cumcount()
+    wide = mapped.set_axis(pd.MultiIndex.from_arrays([mapped.index, position])).unstack()
+    joined = pd.Series('', index=wide.index, dtype=object)
+    for column in wide.columns:
+        labelled = wide[column].notna()
+        separator = np.where(joined[labelled] == '', '', ', ')
+        joined[labelled] = joined[labelled] + separator + wide.loc[labelled, column]
+
+    # IDs with no known label decode to an empty string, missing values stay None
+    decoded = joined.reindex(range(len(uniques)), fill_value='').to_numpy(dtype=object)
+    return pd.Series(np.append(decoded, None)[codes], index=option_ids.index, dtype=object)
+
+def extract_rows(data) -> list:
+
+    # Raw field values only, decoding is left to decode_rows so it runs once over every page
+    rows = []
+
+    # Empty pages come back with data set to null
+    for row in data['data'] or []:
+        person = row.get('person_id') or None
+        phone_numbers = None
+        if person:
+            all_phones = dict.fromkeys(phone['value'].strip() for phone in person['phone'])
+            phone_numbers = ",".join(all_phones) if all_phones else None
+
+        rows.append((
+            row['id'],
+            row['title'],
+            person['value'] if person else None,
+            person['name'] if person else None,
+            phone_numbers,
+            row['user_id']['name'],
+            row['stage_id'],
+            row['pipeline_id'],
+            row['1ed94338f4ab22269018b9b3f37b0967172c0c20'],
+            row['cf55ab58ba9377b340fe91a7886591cac6cafabd'],
+            row['a8b479cb304320c246021ded79cb84243dd67b6f'],
+            row['9303acb9715bc55f1641f24266d13133b05f8c5d'],
+            row['de5b9ae6977eac029ca827c10722948055d982e3']
+        ))
+
+    return rows
+
+def decode_rows(rows: list) -> pd.DataFrame:
+
+    columns = [
+        'Deal - ID',
+        'Deal - Title',
+        'Person - ID',
+        'Deal - Contact person',
+        'phone_number',
+        "Deal - Owner",
+        'Deal - Stage',
+        'Deal - Pipeline',
+        'Deal - CA Tracking Flag',
+        'Deal - Unique Database ID',
+        'Deal - Deal Status',
+        'Deal - Offer Ready Date',
+        'Deal - Offer Ready - Small Date'
+    ]
+
+    pipedrive_df = pd.DataFrame(rows, columns=columns)
+
+    # Stage and pipeline IDs and option ID lists are swapped for labels column-wise
+    pipedrive_df['Deal - Stage'] = pipedrive_df['Deal - Stage'].map(stages_dict)
+    pipedrive_df['Deal - Pipeline'] = pipedrive_df['Deal - Pipeline'].map(pipeline_dict)
+    pipedrive_df['Deal - CA Tracking Flag'] = decode_options(pipedrive_df['Deal - CA Tracking Flag'], ca_tracking_flag_dict)
+    pipedrive_df['Deal - Deal Status'] = decode_options(pipedrive_df['Deal - Deal Status'], deal_status_dict)
+
+    return pipedrive_df
+
+def process_data(data):
+    return decode_rows(extract_rows(data))
+
+def get_base_url() -> str:
+    # Overridable so the fetcher can be pointed at a local stub
+    return os.getenv('PIPEDRIVE_BASE_URL', DEFAULT_BASE_URL).rstrip('/')
+
+def get_session() -> requests.Session:
+    global session
+
+    # One pooled session for every Pipedrive request, sized for the most pages in flight
+    with session_lock:
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENCY)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+
+    return session
+
+def get_retry_delay(response: 'requests.Response | None', attempt: int) -> float:
+
+    # Honour the server's wait when it gives one, otherwise exponential backoff with full jitter
+    if response is not None:
+        wait_seconds = response.headers.get('retry-after') or response.headers.get('x-ratelimit-reset')
+        if wait_seconds and wait_seconds.isdigit():
+            return int(wait_seconds) + random.uniform(0, BACKOFF_SECONDS)
+
+    return random.uniform(0, BACKOFF_SECONDS * 2 ** attempt)
+
+def fetch_data_from_api(next_start=0, extra_params=None) -> 'tuple[dict, dict]':
+
+    url = f"{get_base_url()}/api/v1/deals"
+    params = {'api_token': PIPEDRIVE_API, 'start': next_start, 'limit': PAGE_LIMIT, **(extra_params or {})}
+
+    for attempt in range(MAX_RETRIES + 1):
+        response = None
+        try:
+            response = get_session().get(url, params=params, timeout=REQUEST_TIMEOUT)
+
+            # Rate limits and server errors are retried, anything else is a real failure
+            if response.status_code != 429 and response.status_code < 500:
+                response.raise_for_status()
+                return response.json(), response.headers
+
+            error = f"HTTP {response.status_code}"
+
+        except requests.HTTPError:
+            raise RuntimeError(f"Pipedrive request failed for start {next_start}: HTTP {response.status_code}")
+
+        except requests.RequestException as e:
+            error = str(e)
+
+        if attempt == MAX_RETRIES:
+            raise RuntimeError(f"Pipedrive request failed for start {next_start} after {MAX_RETRIES} retries: {error}")
+
+        print(f"Request failed for start {next_start} ({error}), retrying")
+        time.sleep(get_retry_delay(response, attempt))
+
+def adjust_concurrency(headers: dict, concurrency: int) -> int:
+
+    # Spend at most half of the remaining rate-limit window on pages in flight
+    remaining = headers.get('x-ratelimit-remaining')
+    if remaining is None or not remaining.isdigit():
+        return min(concurrency + 1, MAX_CONCURRENCY)
+
+    remaining = int(remaining)
+    if remaining == 0:
+        reset = headers.get('x-ratelimit-reset', '')
+        time.sleep(int(reset) if reset.isdigit() else BACKOFF_SECONDS)
+
+    return max(1, min(MAX_CONCURRENCY, remaining // 2))
+
+def gather_paginated_data(extra_params=None) -> pd.DataFrame:
+
+    # Pages are requested ahead of the known end, unpacked as they arrive and reassembled in order
+    pages = {}
+    in_flight = {}
+    next_start = 0
+    last_start = None
+    concurrency = INITIAL_CONCURRENCY
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as executor:
+        while True:
+            while len(in_flight) < concurrency and (last_start is None or next_start <= last_start):
+                in_flight[executor.submit(fetch_data_from_api, next_start, extra_params)] = next_start
+                next_start += PAGE_LIMIT
+
+            if not in_flight:
+                break
+
+            done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                start = in_flight.pop(future)
+
+                # Pages past the end of the collection are allowed to fail, any other failure stops the sync
+                try:
+                    result, headers = future.result()
+                except RuntimeError:
+                    if last_start is not None and start > last_start:
+                        continue
+                    for pending in in_flight:
+                        pending.cancel()
+                    raise
+
+                concurrency = adjust_concurrency(headers, concurrency)
+                pagination = (result.get('additional_data') or {}).get('pagination') or {}
+                if not pagination.get('more_items_in_collection'):
+                    last_start = start if last_start is None else min(last_start, start)
+
+                if last_start is None or start <= last_start:
+                    pages[start] = extract_rows(result)
+
+    rows = [row for start in sorted(pages) if last_start is None or start <= last_start for row in pages[start]]
+
+    # Decode every page in one pass, no rows still gives the expected columns
+    return decode_rows(rows)
+
+def gather_updated_deals(since: str, status: 'str | None' = None) -> 'list[dict]':
+
+    # Newest changes first, paging stops at the first deal older than the last sync
+    extra_params = {'sort': 'update_time DESC'}
+    if status:
+        extra_params['status'] = status
+
+    deals = []
+    next_start = 0
+    while True:
+        result, _ = fetch_data_from_api(next_start, extra_params)
+
+        page = result['data'] or []
+        updated = [row for row in page if row['update_time'] and row['update_time'] >= since]
+        deals.extend(updated)
+
+        pagination = result['additional_data']['pagination']
+        if len(updated) < len(page) or not pagination['more_items_in_collection']:
+            return deals
+        next_start = pagination['next_start']
+
+def read_sync_state() -> dict:
+    if not os.path.exists(SYNC_STATE_PATH) or not os.path.exists(PIPEDRIVE_DATA_PATH):
+        return {}
+
+    with open(SYNC_STATE_PATH, 'r') as f:
+        return json.load(f)
+
+def parse_sync_time(value: str) -> datetime:
+    # Sync times are UTC, older state files stored them without an offset
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def write_sync_state(state: dict) -> None:
+    with open(SYNC_STATE_PATH, 'w') as f:
+        json.dump(state, f, indent=4)
+
+def upsert_deals(pipedrive_df: pd.DataFrame, updated_df: pd.DataFrame, deleted_ids: set) -> pd.DataFrame:
+
+    # Keyed by Deal - ID, changed deals replace their old row and deleted deals drop out
+    replaced_ids = set(updated_df['Deal - ID']) | deleted_ids
+    kept_df = pipedrive_df[~pipedrive_df['Deal - ID'].isin(replaced_ids)]
+    return pd.concat([kept_df, updated_df], ignore_index=True).sort_values('Deal - ID', ignore_index=True)
+
+def sync_deals(state: dict) -> pd.DataFrame:
+
+    since = (parse_sync_time(state['last_sync']) - SYNC_OVERLAP).strftime('%Y-%m-%d %H:%M:%S')
+    updated_df = process_data({'data': gather_updated_deals(since)})
+    deleted_ids = {row['id'] for row in gather_updated_deals(since, status='deleted')}
+    print(f"{len(updated_df):,} deals changed and {len(deleted_ids):,} deleted since last sync")
+
+    pipedrive_df = pd.read_csv(PIPEDRIVE_DATA_PATH, low_memory=False, dtype={'phone_number': str})
+    return upsert_deals(pipedrive_df, updated_df, deleted_ids)
+
+
+def main(full: bool = False):
+
+    global ca_tracking_flag_dict, deal_status_dict, pipeline_dict, stages_dict, PIPEDRIVE_API
+
+    print("Extracting Pipedrive Data")
+    load_dotenv('misc/.env')
+
+    PIPEDRIVE_API = os.getenv('PIPEDRIVE_API')
+
+    lookups = load_metadata()
+    ca_tracking_flag_dict = lookups['ca_tracking_flag']
+    deal_status_dict = lookups['deal_status']
+    pipeline_dict = lookups['pipelines']
+    stages_dict = lookups['stages']
+
+    # Pipedrive update_time is UTC, taken before fetching so edits made mid-sync are picked up next time
+    now = datetime.now(timezone.utc)
+    sync_started = now.isoformat(timespec='seconds')
+    state = read_sync_state()
+    if full or not state or now - parse_sync_time(state['full_sync_at']) > timedelta(days=FULL_SYNC_DAYS):
+        df_combined = gather_paginated_data()
+        state = {'full_sync_at': sync_started}
+    else:
+        df_combined = sync_deals(state)
+
+    df_combined.to_csv(PIPEDRIVE_DATA_PATH, index=False)
+    build_phone_deal_index(df_combined)
+    state['last_sync'] = sync_started
+    write_sync_state(state)
+
+if __name__ == "__main__":
+    main()
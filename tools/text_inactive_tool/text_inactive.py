@@ -1,30 +1,36 @@
 import os
 import pandas as pd
-from sqlalchemy import create_engine
 from dotenv import load_dotenv
 from .sql_queries import *
-from .get_pipedrive_data import main as update_pipedrive
+from tools.shared.database import read_sql_queries
+from tools.shared.mirror import use_mirror, read_mirror_queries
+from tools.shared.pipedrive_sync import main as update_pipedrive
+from tools.shared.phone_deal_index import load_phone_deal_index
 from .follow_up import process_fu
 from .new_deals import process_new_deals
-from urllib.parse import quote
 
 def read_cm_live_db() -> 'tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame | None]':
 
     try:
-        # Create database engine
-        host = os.getenv('DB_HOST')
-        user = os.getenv('DB_USER')
-        name = os.getenv('DB_NAME')
-        password = os.getenv('DB_PASSWORD')
-        engine = create_engine(f'mysql+pymysql://{user}:{quote(password)}@{host}/{name}')
-
         print(f'Reading Community Minerals Database')
 
-        # Execute query and fetch the data into a Pandas Dataframe
-        phone_number_df = pd.read_sql_query(phone_number_query, engine)
-        emaiL_address_df = pd.read_sql_query(email_address_query, engine)
-        serial_numbers_df = pd.read_sql_query(serial_numbers_query_mysql, engine)
-        cm_db_df = pd.read_sql_query(cm_db_query, engine)
+        queries = {
+            'phone_number': phone_number_query,
+            'email_address': email_address_query,
+            'serial_numbers': serial_numbers_query_mysql,
+            'cm_db': cm_db_query
+        }
+
+        # Read from the local mirror when enabled, otherwise execute queries concurrently against the live DB
+        if use_mirror():
+            queries['serial_numbers'] = serial_numbers_query
+            results = read_mirror_queries(queries)
+        else:
+            results = read_sql_queries(queries)
+        phone_number_df = results['phone_number']
+        emaiL_address_df = results['email_address']
+        serial_numbers_df = results['serial_numbers']
+        cm_db_df = results['cm_db']
 
         # Change data type of phone number to int
         phone_number_df['phone_number'] = phone_number_df[phone_number_df['phone_number']\
@@ -36,9 +42,6 @@ def read_cm_live_db() -> 'tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.Dat
     except Exception as e:
         raise RuntimeError(f"An error occurred while reading from the database: {e}")
 
-    finally:
-        engine.dispose()
-
 def read_file(path: str) -> pd.DataFrame:
 
     if path.endswith('.csv'):
@@ -57,6 +60,7 @@ def main(files: tuple, save_path: str):
         phone_number_df, email_address_df, serial_numbers_df, cm_db_df = read_cm_live_db()
         update_pipedrive()
         pipedrive_df = read_file('./data/pipedrive/pipedrive_data.csv')
+        phone_deal_index = load_phone_deal_index()
 
         for i, file in enumerate(files, start=1):
 
@@ -65,6 +69,7 @@ def main(files: tuple, save_path: str):
             df = read_file(file)
             no_deal_id_final, cm_db_not_exist = process_fu(df,
                                                            pipedrive_df,
+                                                           phone_deal_index,
                                                            phone_number_df,
                                                            cm_db_df,
                                                            save_path,